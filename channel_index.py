@@ -7,25 +7,48 @@ YouTube Channel Video Index Generator
 
 import argparse
 import csv
+import itertools
 import logging
 import os
 import re
 import sys
 import time
-import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from io import BytesIO
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
 
-import httpx
-import requests
-from dotenv import load_dotenv
+from lxml import etree
 
-# Load environment variables from .env file
-load_dotenv()
+if TYPE_CHECKING:
+    import httpx
 
+# .envの読み込みは実際にAPIキーが必要になるまで遅延させる（--help等の起動を速くする）
+_DOTENV_LOADED = False
 
-@dataclass
+
+def _getenv(name: str) -> Optional[str]:
+    """環境変数を取得（未設定の場合のみ.envファイルを一度だけ読み込んで再取得）"""
+    global _DOTENV_LOADED
+    value = os.getenv(name)
+    if value or _DOTENV_LOADED:
+        return value
+    from dotenv import load_dotenv
+    load_dotenv()
+    _DOTENV_LOADED = True
+    return os.getenv(name)
+
+
+# チャンネルページのHTMLからチャンネルIDを抽出する正規表現
+_CHANNEL_ID_RE = re.compile(rb'channelId":"(UC[0-9A-Za-z_-]+)"')
+
+# slots=True は Python 3.10 以降のみ対応。デフォルト値付きフィールドと手書きの
+# __slots__ は両立しないため、それ以前のバージョンでは通常のdataclassにする
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class VideoMetadata:
     """動画メタデータ"""
     video_id: str
@@ -42,13 +65,51 @@ class VideoMetadata:
 class ChannelIndexGenerator:
     """チャンネル動画インデックス生成ツール"""
 
+    # Atomフィードの名前空間定義
+    NS = {
+        'atom': 'http://www.w3.org/2005/Atom',
+        'yt': 'http://www.youtube.com/xml/schemas/2015',
+        'media': 'http://search.yahoo.com/mrss/'
+    }
+
+    # 出力CSVの列（save_to_csvの行タプルと同じ順序）
+    CSV_FIELDS = (
+        'video_id', 'title', 'url', 'published_at',
+        'description', 'channel_name', 'channel_id'
+    )
+
+    # API呼び出しのレート制限時の最大再試行回数と、403応答のうち再試行するエラー理由
+    API_MAX_RETRIES = 5
+    RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+    # エントリーの各フィールドを取り出すXPath（クラス読み込み時に一度だけコンパイル）
+    # string() は要素が無い場合に空文字列を返すため、None判定が不要。
+    # smart_strings=False で素のstrを返し、結果が要素ツリーへの参照を保持しないようにする
+    _XP_NAME = etree.XPath('string(atom:name)', namespaces=NS, smart_strings=False)
+    _XP_VIDEO_ID = etree.XPath('string(yt:videoId)', namespaces=NS, smart_strings=False)
+    _XP_TITLE = etree.XPath('string(atom:title)', namespaces=NS, smart_strings=False)
+    _XP_PUBLISHED = etree.XPath('string(atom:published)', namespaces=NS, smart_strings=False)
+    _XP_DESCRIPTION = etree.XPath('string(media:group/media:description)', namespaces=NS, smart_strings=False)
+    _XP_VIEWS = etree.XPath('string(media:group/media:community/media:statistics/@views)', namespaces=NS, smart_strings=False)
+
+    # iterparseで監視するタグ（Clark表記）
+    _FEED_TAG = '{http://www.w3.org/2005/Atom}feed'
+    _AUTHOR_TAG = '{http://www.w3.org/2005/Atom}author'
+    _ENTRY_TAG = '{http://www.w3.org/2005/Atom}entry'
+
     def __init__(self, channel_id: str, output_file: str = "index.csv",
-                 max_pages: int = 10, verbose: bool = False):
+                 max_pages: int = 10, verbose: bool = False,
+                 stream_ids: bool = False):
         self.channel_id = channel_id
         self.output_file = Path(output_file)
         self.max_pages = max_pages
         self.verbose = verbose
-        self.videos: List[VideoMetadata] = []
+        # Trueの場合、CSVへの書き込みと同時に動画を1行ずつ標準出力へ流す
+        # （標準出力はパイプ専用になるため、表示メッセージは標準エラー出力へ回す）
+        self.stream_ids = stream_ids
+        self._console = sys.stderr if stream_ids else sys.stdout
+        self.newest: Optional[VideoMetadata] = None
+        self.oldest: Optional[VideoMetadata] = None
 
         # ロギング設定
         log_level = logging.INFO if verbose else logging.WARNING
@@ -58,253 +119,321 @@ class ChannelIndexGenerator:
         )
         self.logger = logging.getLogger(__name__)
 
+        # HTTPクライアントは初回の通信時に1つだけ作成し、フィード・API呼び出し間で接続を再利用
+        self._http_client: Optional["httpx.Client"] = None
+
+    @property
+    def _http(self) -> "httpx.Client":
+        """共有HTTPクライアント（httpxは初回使用時にインポート）"""
+        if self._http_client is None:
+            import httpx
+            self._http_client = httpx.Client(http2=True, timeout=30, follow_redirects=True)
+        return self._http_client
+
+    def close(self):
+        """HTTPクライアントを閉じる"""
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+    def __enter__(self) -> "ChannelIndexGenerator":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     def get_channel_id_from_url(self, url: str) -> Optional[str]:
         """URLからチャンネルIDを取得"""
         try:
-            response = requests.get(url, timeout=30)
-            html = response.text
-            match = re.search(r'channelId":"(UC[0-9A-Za-z_-]+)"', html)
+            response = self._http.get(url)
+            # HTML全体をデコードせず、バイト列のまま検索してIDのみデコード
+            match = _CHANNEL_ID_RE.search(response.content)
             if match:
-                return match.group(1)
+                return match.group(1).decode('ascii')
         except Exception as e:
             self.logger.error(f"Failed to get channel ID from URL: {e}")
         return None
 
-    def fetch_channel_feed(self) -> Optional[str]:
+    def fetch_channel_feed(self) -> Optional[bytes]:
         """チャンネルのAtomフィードを取得"""
         feed_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={self.channel_id}"
         try:
-            response = httpx.get(feed_url, timeout=30)
+            response = self._http.get(feed_url)
             response.raise_for_status()
-            return response.text
+            # lxmlはバイト列を直接パースできるため、文字列へのデコードは行わない
+            return response.content
         except Exception as e:
             self.logger.error(f"Failed to fetch channel feed: {e}")
             return None
 
-    def parse_feed(self, feed_content: str) -> List[VideoMetadata]:
+    def parse_feed(self, feed_content: bytes) -> List[VideoMetadata]:
         """Atomフィードをパースして動画情報を抽出"""
         videos: List[VideoMetadata] = []
         try:
-            root = ET.fromstring(feed_content)
-
-            # 名前空間定義
-            ns = {
-                'atom': 'http://www.w3.org/2005/Atom',
-                'yt': 'http://www.youtube.com/xml/schemas/2015',
-                'media': 'http://search.yahoo.com/mrss/'
-            }
-
-            # チャンネル情報を取得
             channel_name = ""
-            author_elem = root.find('atom:author/atom:name', ns)
-            if author_elem is not None:
-                channel_name = author_elem.text or ""
-
-            # 各エントリー（動画）を処理
-            for entry in root.findall('atom:entry', ns):
-                video_id_elem = entry.find('yt:videoId', ns)
-                if video_id_elem is None:
+
+            # DOM全体を構築せず、エントリー単位で逐次パースする
+            context = etree.iterparse(
+                BytesIO(feed_content),
+                events=('end',),
+                tag=(self._AUTHOR_TAG, self._ENTRY_TAG)
+            )
+            for _, entry in context:
+                # チャンネル情報（フィード直下のauthor）を取得
+                if entry.tag == self._AUTHOR_TAG:
+                    parent = entry.getparent()
+                    if parent is not None and parent.tag == self._FEED_TAG:
+                        channel_name = self._XP_NAME(entry)
                     continue
 
-                video_id = video_id_elem.text or ""
-
-                # タイトル
-                title_elem = entry.find('atom:title', ns)
-                title = title_elem.text if title_elem is not None else ""
-
-                # 公開日時
-                published_elem = entry.find('atom:published', ns)
-                published = published_elem.text if published_elem is not None else ""
-
-                # 説明文（media:description）
-                description_elem = entry.find('media:group/media:description', ns)
-                description = description_elem.text if description_elem is not None else ""
-
-                # 再生回数と評価
-                stats_elem = entry.find('media:group/media:community', ns)
-                views = ""
-                if stats_elem is not None:
-                    statistics = stats_elem.find('media:statistics', ns)
-                    if statistics is not None:
-                        views = statistics.get('views', '')
-
-                video = VideoMetadata(
-                    video_id=video_id,
-                    title=title or "",
-                    url=f"https://www.youtube.com/watch?v={video_id}",
-                    published_at=published or "",
-                    description=description[:500] if description else "",  # 説明文は最初の500文字まで
-                    duration="",  # フィードには含まれない
-                    views=views,
-                    channel_name=channel_name,
-                    channel_id=self.channel_id
-                )
-                videos.append(video)
+                # 各エントリー（動画）を処理し、処理済みの要素は即座に解放
+                video = self._parse_entry(entry, channel_name)
+                entry.clear()
+                while entry.getprevious() is not None:
+                    del entry.getparent()[0]
+                if video is not None:
+                    videos.append(video)
 
         except Exception as e:
             self.logger.error(f"Failed to parse feed: {e}")
 
         return videos
 
-    def fetch_all_videos_via_api(self) -> List[VideoMetadata]:
-        """YouTube Data APIを使用して全動画を取得（APIキーが必要）"""
-        api_key = os.getenv('YOUTUBE_API_KEY')
-        if not api_key:
-            self.logger.warning("YOUTUBE_API_KEY not found in environment or .env file. Using feed method (limited to recent videos).")
-            return []
+    def _parse_entry(self, entry: "etree._Element", channel_name: str) -> Optional[VideoMetadata]:
+        """Atomフィードの1エントリーから動画情報を抽出"""
+        video_id = self._XP_VIDEO_ID(entry)
+        if not video_id:
+            return None
 
-        videos: List[VideoMetadata] = []
-        next_page_token = None
-        page_count = 0
+        # 説明文（media:description）は最初の500文字まで。
+        # 代入時に一度だけ切り詰め、元の長い文字列はすぐに解放させる
+        description = self._XP_DESCRIPTION(entry)[:500]
+
+        return VideoMetadata(
+            video_id=video_id,
+            title=self._XP_TITLE(entry),
+            url=f"https://www.youtube.com/watch?v={video_id}",
+            published_at=self._XP_PUBLISHED(entry),
+            description=description,
+            duration="",  # フィードには含まれない
+            views=self._XP_VIEWS(entry),  # 再生回数
+            channel_name=channel_name,
+            channel_id=self.channel_id
+        )
 
-        uploads_playlist_id = ""
-        channel_name = ""
+    def fetch_all_videos_via_api(self) -> Iterator[VideoMetadata]:
+        """YouTube Data APIを使用して全動画を取得（APIキーが必要）
 
-        try:
-            while page_count < self.max_pages:
-                # チャンネルのアップロード済み動画プレイリストIDを取得
-                if page_count == 0:
-                    channel_url = "https://www.googleapis.com/youtube/v3/channels"
-                    channel_params = {
-                        'part': 'contentDetails,snippet',
-                        'id': self.channel_id,
-                        'key': api_key
-                    }
-                    response = requests.get(channel_url, params=channel_params, timeout=30)
-                    data = response.json()
-                    
-                    # デバッグ情報を追加
-                    if 'error' in data:
-                        self.logger.error(f"API error: {data['error']}")
-                        return []
-
-                    if not data.get('items'):
-                        self.logger.error(f"Channel not found. API Response: {data}")
-                        return []
-
-                    channel_info = data['items'][0]
-                    uploads_playlist_id = channel_info['contentDetails']['relatedPlaylists']['uploads']
-                    channel_name = channel_info['snippet']['title']
-
-                # プレイリストアイテムを取得
-                playlist_url = "https://www.googleapis.com/youtube/v3/playlistItems"
-                playlist_params: Dict[str, str] = {
-                    'part': 'snippet,contentDetails',
-                    'playlistId': uploads_playlist_id,
-                    'maxResults': '50',
-                    'key': api_key
-                }
-
-                if next_page_token:
-                    playlist_params['pageToken'] = next_page_token
-
-                response = requests.get(playlist_url, params=playlist_params, timeout=30)
-                data = response.json()
-
-                if 'error' in data:
-                    self.logger.error(f"API error: {data['error']['message']}")
-                    break
-
-                for item in data.get('items', []):
-                    snippet = item['snippet']
-                    video_id = snippet['resourceId']['videoId']
-
-                    video = VideoMetadata(
-                        video_id=video_id,
-                        title=snippet.get('title', ''),
-                        url=f"https://www.youtube.com/watch?v={video_id}",
-                        published_at=snippet.get('publishedAt', ''),
-                        description=snippet.get('description', '')[:500],
-                        duration="",
-                        views="",
-                        channel_name=channel_name,
-                        channel_id=self.channel_id
-                    )
-                    videos.append(video)
+        ページを取得するたびに動画情報を逐次yieldする。
+        """
+        api_key = _getenv('YOUTUBE_API_KEY')
+        if not api_key:
+            self.logger.warning("YOUTUBE_API_KEY not found in environment or .env file. Using feed method (limited to recent videos).")
+            return
 
-                next_page_token = data.get('nextPageToken')
-                if not next_page_token:
-                    break
+        try:
+            # チャンネルのアップロード済み動画プレイリストIDを取得
+            channel_url = "https://www.googleapis.com/youtube/v3/channels"
+            channel_params = {
+                'part': 'contentDetails,snippet',
+                'id': self.channel_id,
+                'key': api_key
+            }
+            data = self._api_get(channel_url, channel_params)
+
+            # デバッグ情報を追加
+            if 'error' in data:
+                self.logger.error(f"API error: {data['error']}")
+                return
+
+            if not data.get('items'):
+                self.logger.error(f"Channel not found. API Response: {data}")
+                return
+
+            channel_info = data['items'][0]
+            uploads_playlist_id = channel_info['contentDetails']['relatedPlaylists']['uploads']
+            channel_name = channel_info['snippet']['title']
+            channel_id = self.channel_id
+
+            # ページトークンは前ページの応答からしか得られないため、
+            # 次ページの取得をバックグラウンドで先行させ、現在ページの書き出しと重ねる
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                # --max-pages 0 では1ページも取得しない
+                future: Optional[Future] = None
+                if self.max_pages > 0:
+                    future = executor.submit(self._fetch_playlist_page, api_key, uploads_playlist_id, None)
+                page_count = 0
+
+                while future is not None:
+                    data = future.result()
+                    page_count += 1
 
-                page_count += 1
-                time.sleep(0.5)  # レート制限対策
+                    if 'error' in data:
+                        self.logger.error(f"API error: {data['error']['message']}")
+                        break
+
+                    next_page_token = data.get('nextPageToken')
+                    future = None
+                    if next_page_token and page_count < self.max_pages:
+                        future = executor.submit(
+                            self._fetch_playlist_page, api_key, uploads_playlist_id,
+                            next_page_token)
+
+                    for item in data.get('items', []):
+                        snippet = item['snippet']
+                        video_id = snippet['resourceId']['videoId']
+                        yield VideoMetadata(
+                            video_id=video_id,
+                            title=snippet.get('title', ''),
+                            url=f"https://www.youtube.com/watch?v={video_id}",
+                            published_at=snippet.get('publishedAt', ''),
+                            description=(snippet.get('description') or '')[:500],
+                            duration="",
+                            views="",
+                            channel_name=channel_name,
+                            channel_id=channel_id
+                        )
 
         except Exception as e:
             self.logger.error(f"Failed to fetch videos via API: {e}")
 
-        return videos
+    def _fetch_playlist_page(self, api_key: str, playlist_id: str,
+                             page_token: Optional[str]) -> Dict[str, Any]:
+        """アップロード済み動画プレイリストの1ページを取得"""
+        playlist_url = "https://www.googleapis.com/youtube/v3/playlistItems"
+        playlist_params: Dict[str, str] = {
+            'part': 'snippet,contentDetails',
+            'playlistId': playlist_id,
+            'maxResults': '50',
+            'key': api_key
+        }
 
-    def save_to_csv(self):
-        """動画情報をCSVファイルに保存"""
-        if not self.videos:
-            self.logger.warning("No videos to save")
-            return
+        if page_token:
+            playlist_params['pageToken'] = page_token
 
-        # CSVファイルに書き込み
-        with open(self.output_file, 'w', encoding='utf-8', newline='') as f:
-            fieldnames = [
-                'video_id', 'title', 'url', 'published_at',
-                'description', 'channel_name', 'channel_id'
-            ]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for video in self.videos:
-                writer.writerow({
-                    'video_id': video.video_id,
-                    'title': video.title,
-                    'url': video.url,
-                    'published_at': video.published_at,
-                    'description': video.description,
-                    'channel_name': video.channel_name,
-                    'channel_id': video.channel_id
-                })
-
-        self.logger.info(f"Saved {len(self.videos)} videos to {self.output_file}")
-
-    def run(self):
-        """メイン処理を実行"""
-        self.logger.info(f"Fetching videos for channel: {self.channel_id}")
+        return self._api_get(playlist_url, playlist_params)
+
+    def _api_get(self, url: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """YouTube Data APIを呼び出し、レート制限時のみ指数バックオフで再試行
+
+        クォータは1日単位のため、quotaExceeded 等の403はすぐにエラー応答を返す。
+        """
+        for attempt in range(self.API_MAX_RETRIES + 1):
+            response = self._http.get(url, params=params)
+            data = response.json()
+
+            reasons = {e.get('reason') for e in data.get('error', {}).get('errors', [])}
+            rate_limited = (response.status_code == 429 or
+                            (response.status_code == 403 and bool(reasons & self.RATE_LIMIT_REASONS)))
+            if not rate_limited or attempt == self.API_MAX_RETRIES:
+                return data
+
+            wait = 2 ** attempt
+            self.logger.warning(f"API rate limited (HTTP {response.status_code}), retrying in {wait}s...")
+            time.sleep(wait)
+
+        return data
+
+    def iter_videos(self) -> Iterator[VideoMetadata]:
+        """動画情報を逐次取得（API優先、取得できなければRSSフィード）"""
+        found = False
 
         # YouTube Data API経由で取得を試みる
-        self.videos = self.fetch_all_videos_via_api()
+        for video in self.fetch_all_videos_via_api():
+            found = True
+            yield video
 
         # APIが使えない場合はフィード経由で取得（最近の動画のみ）
-        if not self.videos:
+        if not found:
             self.logger.info("Fetching from RSS feed (recent videos only)...")
             feed_content = self.fetch_channel_feed()
             if feed_content:
-                self.videos = self.parse_feed(feed_content)
+                yield from self.parse_feed(feed_content)
 
-        if self.videos:
-            # 公開日時でソート（新しい順）
-            self.videos.sort(key=lambda x: x.published_at, reverse=True)
+    def save_to_csv(self, videos: Iterable[VideoMetadata]) -> int:
+        """動画情報を受け取った順にCSVファイルへ書き出し、書き込んだ件数を返す
 
-            self.logger.info(f"Found {len(self.videos)} videos")
+        動画リストを保持・ソートせず、書き込みながら公開日時の最大・最小を比較して
+        最新・最古の動画のみ記録する（ISO 8601文字列は辞書順＝時系列順）。
+        """
+        iterator = iter(videos)
+        first = next(iterator, None)
+        if first is None:
+            self.logger.warning("No videos to save")
+            return 0
+
+        newest = oldest = first
+        count = 0
+
+        # CSVファイルに書き込み（大きめのバッファでまとめて書き出す）
+        with open(self.output_file, 'w', encoding='utf-8', newline='',
+                  buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(self.CSV_FIELDS)
+            for v in itertools.chain((first,), iterator):
+                writer.writerow((v.video_id, v.title, v.url, v.published_at,
+                                 v.description, v.channel_name, v.channel_id))
+                if self.stream_ids:
+                    self._stream_video(v)
+                if v.published_at > newest.published_at:
+                    newest = v
+                elif v.published_at < oldest.published_at:
+                    oldest = v
+                count += 1
+
+        self.newest = newest
+        self.oldest = oldest
+
+        self.logger.info(f"Saved {count} videos to {self.output_file}")
+        return count
+
+    def _stream_video(self, video: VideoMetadata):
+        """動画IDとタイトル・公開日時をタブ区切りの1行で標準出力へ書き出す
+
+        後段（yt_summary.py --video-ids-stdin）がCSVの完成を待たずに処理を始められる。
+        後段が先に終了した場合はストリームのみ止め、CSVの書き込みは最後まで続ける。
+        """
+        title = video.title.replace('\t', ' ').replace('\n', ' ')
+        try:
+            sys.stdout.write(f"{video.video_id}\t{title}\t{video.published_at}\n")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            self.logger.info("Output pipe closed; continuing to write CSV only")
+            self.stream_ids = False
+            # 終了時のflushで再度BrokenPipeErrorにならないよう標準出力を破棄先へ向ける
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+
+    def run(self) -> int:
+        """メイン処理を実行し、CSVに保存した動画数を返す"""
+        self.logger.info(f"Fetching videos for channel: {self.channel_id}")
+
+        # 取得した動画を受け取った順のままCSVに書き出す（全件ソートはしない）
+        count = self.save_to_csv(self.iter_videos())
 
-            # CSVに保存
-            self.save_to_csv()
+        if count:
+            self.logger.info(f"Found {count} videos")
 
             # サマリー表示
-            if self.verbose:
-                print("\n=== Channel Summary ===")
-                print(f"Channel ID: {self.channel_id}")
-                if self.videos:
-                    print(f"Channel Name: {self.videos[0].channel_name}")
-                print(f"Total Videos: {len(self.videos)}")
-                if self.videos:
-                    # 最新と最古の動画
-                    newest = self.videos[0]
-                    oldest = self.videos[-1]
-                    print(f"Newest Video: {newest.title[:50]}... ({newest.published_at[:10]})")
-                    print(f"Oldest Video: {oldest.title[:50]}... ({oldest.published_at[:10]})")
-                print(f"\nOutput saved to: {self.output_file}")
+            if self.verbose and self.newest is not None and self.oldest is not None:
+                print("\n=== Channel Summary ===", file=self._console)
+                print(f"Channel ID: {self.channel_id}", file=self._console)
+                print(f"Channel Name: {self.newest.channel_name}", file=self._console)
+                print(f"Total Videos: {count}", file=self._console)
+                # 最新と最古の動画
+                newest = self.newest
+                oldest = self.oldest
+                print(f"Newest Video: {newest.title[:50]}... ({newest.published_at[:10]})", file=self._console)
+                print(f"Oldest Video: {oldest.title[:50]}... ({oldest.published_at[:10]})", file=self._console)
+                print(f"\nOutput saved to: {self.output_file}", file=self._console)
         else:
             self.logger.error("No videos found")
 
+        return count
 
-def main():
-    """メインエントリーポイント"""
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """コマンドライン引数を解析（argvがNoneの場合はsys.argvを使用）"""
     parser = argparse.ArgumentParser(
         description='YouTube Channel Video Index Generator - チャンネル内の全動画情報をCSVに出力',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -323,6 +452,9 @@ def main():
   export YOUTUBE_API_KEY="your-api-key"
   python channel_index.py UC_x5XG1OV2P6uZZ5FSM9Ttw --max-pages 20
 
+  # 取得と同時に要約処理へ流す（CSVも通常どおり出力）
+  python channel_index.py UC_x5XG1OV2P6uZZ5FSM9Ttw --stream-ids | python yt_summary.py --video-ids-stdin
+
 注意:
   - RSS フィード経由では最新15-20件程度の動画のみ取得可能
   - 全動画を取得するには YouTube Data API キーが必要
@@ -337,36 +469,57 @@ def main():
                        help='入力をチャンネルURLとして処理し、自動的にチャンネルIDを取得')
     parser.add_argument('--max-pages', type=int, default=10,
                        help='API使用時の最大ページ数 (1ページ50動画, default: 10)')
+    parser.add_argument('--stream-ids', action='store_true',
+                       help='取得した動画を「動画ID<TAB>タイトル<TAB>公開日時」の形式で1行ずつ標準出力へ出力'
+                            '（yt_summary.py --video-ids-stdin へパイプで渡す用途）')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='詳細な出力を表示')
 
-    args = parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> int:
+    """解析済みの引数でインデックス生成を実行し、CSVに保存した動画数を返す
+
+    process_channel.py からプロセスを起動せずに直接呼び出すためのエントリーポイント。
+    URLからチャンネルIDを取得できない場合は ValueError を送出する。
+    """
+    # --stream-ids 時は標準出力を動画ストリーム専用にする
+    console = sys.stderr if args.stream_ids else sys.stdout
 
     # チャンネルIDの取得
     channel_id = args.channel_input
 
     if args.from_url:
         # URLからチャンネルIDを取得
-        generator = ChannelIndexGenerator("", args.output, args.max_pages, args.verbose)
-        extracted_id = generator.get_channel_id_from_url(args.channel_input)
+        with ChannelIndexGenerator("", args.output, args.max_pages, args.verbose) as generator:
+            extracted_id = generator.get_channel_id_from_url(args.channel_input)
         if not extracted_id:
-            print(f"Error: Could not extract channel ID from URL: {args.channel_input}")
-            sys.exit(1)
+            raise ValueError(f"Could not extract channel ID from URL: {args.channel_input}")
         channel_id = extracted_id
-        print(f"Extracted channel ID: {channel_id}")
+        print(f"Extracted channel ID: {channel_id}", file=console)
     elif not channel_id.startswith('UC'):
-        print(f"Warning: Channel ID should start with 'UC'. Got: {channel_id}")
+        print(f"Warning: Channel ID should start with 'UC'. Got: {channel_id}", file=console)
 
     # インデックス生成を実行
-    generator = ChannelIndexGenerator(
+    with ChannelIndexGenerator(
         channel_id=channel_id,
         output_file=args.output,
         max_pages=args.max_pages,
-        verbose=args.verbose
-    )
-    generator.run()
+        verbose=args.verbose,
+        stream_ids=args.stream_ids
+    ) as generator:
+        return generator.run()
+
+
+def main(argv: Optional[List[str]] = None):
+    """メインエントリーポイント"""
+    try:
+        run(parse_args(argv))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == '__main__':
     main()
-
@@ -1,9 +1,39 @@
-import csv
+import mmap
+import os
+
+# mmapから一度に取り出して数えるウィンドウサイズ
+WINDOW_SIZE = 1 << 24
 
 def count_csv_rows(file_path):
-    with open(file_path, 'r') as file:
-        reader = csv.reader(file)
-        row_count = sum(1 for row in reader)
+    # csv.readerで全件をトークン化せず、ファイルをmmapして改行バイトを直接数える。
+    # bytes.count は memchr ベースなのでメモリ帯域に近い速度で走査できる。
+    # クォート内の改行（説明文など）はレコード区切りではないため、
+    # ウィンドウに '"' を含む場合のみクォートの偶奇を追って数える。
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return 0
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            row_count = 0
+            in_quotes = False
+            for start in range(0, size, WINDOW_SIZE):
+                buf = mm[start:start + WINDOW_SIZE]
+                if not in_quotes and b'"' not in buf:
+                    row_count += buf.count(b'\n')
+                else:
+                    for i, part in enumerate(buf.split(b'\n')):
+                        if i and not in_quotes:
+                            row_count += 1
+                        if part.count(b'"') % 2:
+                            in_quotes = not in_quotes
+
+            # 末尾に改行のない最終行
+            if mm[size - 1:size] != b'\n':
+                row_count += 1
     return row_count
 
 file_path = '/Users/jangom2ok/work/tmp/youtube/zatsukuriwakaru/index_a.csv'  # CSVファイルのパスを指定
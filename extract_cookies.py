@@ -59,9 +59,24 @@ def get_safari_cookies_db() -> Optional[Path]:
     return None
 
 
+# Netscape cookie format: domain, include subdomains, path, secure, expiry, name, value
+NETSCAPE_LINE = '%s\t%s\t%s\t%s\t%d\t%s\t%s'
+
+
 def extract_cookies_sqlite(db_path: Path, domain: str = '.youtube.com') -> list[str]:
     """Extract cookies from SQLite database (Chrome/Firefox style)"""
-    # Create a temporary copy to avoid locking issues
+    # Open the database in place, read-only. immutable=1 tells SQLite the file
+    # won't change, so no lock is taken and a running browser can't block us.
+    try:
+        conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro&immutable=1", uri=True)
+        try:
+            return _read_cookies(conn, domain)
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        pass
+
+    # Fall back to reading a temporary copy
     with tempfile.NamedTemporaryFile(delete=False) as tmp:
         tmp_path = tmp.name
 
@@ -69,41 +84,10 @@ def extract_cookies_sqlite(db_path: Path, domain: str = '.youtube.com') -> list[
         shutil.copy2(db_path, tmp_path)
 
         conn = sqlite3.connect(tmp_path)
-        cursor = conn.cursor()
-
-        # Try to get cookies
         try:
-            cursor.execute("""
-                SELECT host_key, name, value, path, expires_utc, is_secure, is_httponly, has_expires
-                FROM cookies
-                WHERE host_key LIKE ?
-            """, (f'%{domain}%',))
-        except sqlite3.OperationalError:
-            # Try alternative column names
-            cursor.execute("""
-                SELECT host, name, value, path, expiry, isSecure, isHttpOnly, 1
-                FROM moz_cookies
-                WHERE host LIKE ?
-            """, (f'%{domain}%',))
-
-        cookies: list[str] = []
-        for row in cursor.fetchall():
-            host, name, value, path, expires, secure, _, has_expires = row
-
-            # Netscape cookie format
-            cookie_line = '\t'.join([
-                host,
-                'TRUE' if host.startswith('.') else 'FALSE',
-                path,
-                'TRUE' if secure else 'FALSE',
-                str(expires) if has_expires else '0',
-                name,
-                value
-            ])
-            cookies.append(cookie_line)  # type: ignore[arg-type]
-
-        conn.close()
-        return cookies
+            return _read_cookies(conn, domain)
+        finally:
+            conn.close()
 
     finally:
         # Clean up temp file
@@ -111,6 +95,38 @@ def extract_cookies_sqlite(db_path: Path, domain: str = '.youtube.com') -> list[
             os.unlink(tmp_path)
 
 
+def _read_cookies(conn: sqlite3.Connection, domain: str) -> list[str]:
+    """Read cookies for a domain from an open cookies database in Netscape format"""
+    cursor = conn.cursor()
+
+    # Try to get cookies
+    try:
+        cursor.execute("""
+            SELECT host_key, name, value, path, expires_utc, is_secure, is_httponly, has_expires
+            FROM cookies
+            WHERE host_key LIKE ?
+        """, (f'%{domain}%',))
+    except sqlite3.OperationalError:
+        # Try alternative column names
+        cursor.execute("""
+            SELECT host, name, value, path, expiry, isSecure, isHttpOnly, 1
+            FROM moz_cookies
+            WHERE host LIKE ?
+        """, (f'%{domain}%',))
+
+    return [
+        NETSCAPE_LINE % (
+            host,
+            'TRUE' if host.startswith('.') else 'FALSE',
+            path,
+            'TRUE' if secure else 'FALSE',
+            int(expires or 0) if has_expires else 0,
+            name,
+            value)
+        for host, name, value, path, expires, secure, _, has_expires in cursor.fetchall()
+    ]
+
+
 def extract_cookies_browser_cookie3(browser: str = 'chrome', domain: str = 'youtube.com') -> Optional[list[str]]:
     """Extract cookies using browser_cookie3 library"""
     if not HAS_BROWSER_COOKIE3:
@@ -128,19 +144,18 @@ def extract_cookies_browser_cookie3(browser: str = 'chrome', domain: str = 'yout
         else:
             return None
 
-        cookies: list[str] = []
-        for cookie in cj:  # type: ignore[assignment]
-            # Netscape cookie format
-            cookie_line = '\t'.join([
-                str(cookie.domain),  # type: ignore[attr-defined]
-                'TRUE' if str(cookie.domain).startswith('.') else 'FALSE',  # type: ignore[attr-defined]
-                str(cookie.path),  # type: ignore[attr-defined]
+        # Cookie attributes are already strings, so format them directly
+        cookies: list[str] = [
+            NETSCAPE_LINE % (
+                cookie.domain,  # type: ignore[attr-defined]
+                'TRUE' if cookie.domain.startswith('.') else 'FALSE',  # type: ignore[attr-defined]
+                cookie.path,  # type: ignore[attr-defined]
                 'TRUE' if cookie.secure else 'FALSE',  # type: ignore[attr-defined]
-                str(int(cookie.expires)) if cookie.expires else '0',  # type: ignore[attr-defined]
-                str(cookie.name),  # type: ignore[attr-defined]
-                str(cookie.value)  # type: ignore[attr-defined]
-            ])
-            cookies.append(cookie_line)  # type: ignore[arg-type]
+                int(cookie.expires or 0),  # type: ignore[attr-defined]
+                cookie.name,  # type: ignore[attr-defined]
+                cookie.value)  # type: ignore[attr-defined]
+            for cookie in cj  # type: ignore[assignment]
+        ]
 
         return cookies
 
@@ -149,16 +164,19 @@ def extract_cookies_browser_cookie3(browser: str = 'chrome', domain: str = 'yout
         return None
 
 
+NETSCAPE_HEADER = (
+    "# Netscape HTTP Cookie File\n"
+    "# This file was generated by extract_cookies.py\n"
+    "# https://curl.haxx.se/rfc/cookie_spec.html\n\n"
+)
+
+
 def save_cookies_netscape(cookies: list[str], output_file: str) -> None:
     """Save cookies in Netscape format (compatible with yt-dlp)"""
-    with open(output_file, 'w') as f:
-        # Netscape cookies file header
-        f.write("# Netscape HTTP Cookie File\n")
-        f.write("# This file was generated by extract_cookies.py\n")
-        f.write("# https://curl.haxx.se/rfc/cookie_spec.html\n\n")
-
-        for cookie in cookies:
-            f.write(cookie + '\n')
+    # Build the whole file once and write it in a single call
+    content = NETSCAPE_HEADER + ''.join(cookie + '\n' for cookie in cookies)
+    with open(output_file, 'w', buffering=1 << 16) as f:
+        f.write(content)
 
 
 def main() -> int:
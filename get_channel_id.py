@@ -1,26 +1,60 @@
 #!/usr/bin/env python3
-import subprocess
 import sys
 import re
 import requests
 
+# yt-dlp はサブプロセスではなくライブラリとして直接呼び出す
+try:
+    from yt_dlp import YoutubeDL
+    from yt_dlp.utils import YoutubeDLError
+    HAS_YT_DLP = True
+except ImportError:
+    YoutubeDL = None  # type: ignore[assignment,misc]
+    YoutubeDLError = Exception  # type: ignore[assignment,misc]
+    HAS_YT_DLP = False
+
+# チャンネルIDを含むパターン（優先度順）。ページには他チャンネルのIDも含まれるため、
+# 出現位置ではなくこの順で採用する
+_CHANNEL_PATTERNS = [re.compile(pattern) for pattern in (
+    rb'"channelId":"(UC[0-9A-Za-z_-]{22})"',
+    rb'"browseId":"(UC[0-9A-Za-z_-]{22})"',
+    rb'channel/(UC[0-9A-Za-z_-]{22})',
+    rb'"externalChannelId":"(UC[0-9A-Za-z_-]{22})"',
+)]
+# 最長のマッチ（"externalChannelId":"UC + 22文字 + 閉じ引用符）より長く取っておく末尾のバイト数
+_TAIL_BYTES = 64
+
+_ydl = None
+
+def _get_ydl():
+    """複数URLを処理する場合に備えてYoutubeDLインスタンスを使い回す"""
+    global _ydl
+    if _ydl is None:
+        _ydl = YoutubeDL({
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': True,  # フォーマット一覧の取得を省略
+            'skip_download': True,
+            'noplaylist': True,
+            'playlistend': 1,  # チャンネル情報の取得に必要なのは先頭ページのみ
+            'socket_timeout': 15,
+        })
+    return _ydl
+
 def get_channel_id_with_ytdlp(url):
     """yt-dlpを使ってチャンネルIDを取得"""
+    if not HAS_YT_DLP:
+        return None
     try:
-        # --no-playlistオプションを追加して単一の結果のみ取得
-        result = subprocess.run(
-            ['yt-dlp', '--no-playlist', '--print', 'channel_id', url],
-            capture_output=True,
-            text=True,
-            timeout=15
-        )
-        
-        if result.returncode == 0 and result.stdout.strip():
-            # 最初の行のみ取得（重複を避ける）
-            channel_id = result.stdout.strip().split('\n')[0]
-            if channel_id.startswith('UC'):
-                return channel_id
-    except (subprocess.TimeoutExpired, FileNotFoundError):
+        # extract_flat によりチャンネル内の各動画は辿らずにメタデータのみ取得する
+        # （process=False ではハンドルURLなどが未解決の url エントリのまま返ることがある）
+        info = _get_ydl().extract_info(url, download=False)
+        if info:
+            for key in ('channel_id', 'uploader_id', 'id'):
+                channel_id = info.get(key)
+                if isinstance(channel_id, str) and channel_id.startswith('UC'):
+                    return channel_id
+    except YoutubeDLError:
         pass
     return None
 
@@ -32,23 +66,26 @@ def get_channel_id_with_requests(url):
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        html = response.text
-        
-        # 様々なパターンでチャンネルIDを検索
-        patterns = [
-            r'"channelId":"(UC[0-9A-Za-z_-]{22})"',
-            r'"browseId":"(UC[0-9A-Za-z_-]{22})"',
-            r'channel/(UC[0-9A-Za-z_-]{22})',
-            r'"externalChannelId":"(UC[0-9A-Za-z_-]{22})"',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, html)
-            if matches:
-                # UCで始まる最初のマッチを返す
-                return matches[0]
+        # チャンクごとに各パターンの最初のマッチを記録し、
+        # 最優先のパターンが見つかった時点で残りの読み込みを打ち切る
+        found: list = [None] * len(_CHANNEL_PATTERNS)
+        with requests.get(url, headers=headers, timeout=10, stream=True) as response:
+            response.raise_for_status()
+
+            buf = b''
+            for chunk in response.iter_content(chunk_size=32768):
+                buf += chunk
+                for i, pattern in enumerate(_CHANNEL_PATTERNS):
+                    if found[i] is None:
+                        match = pattern.search(buf)
+                        if match:
+                            found[i] = match.group(1).decode('ascii')
+                if found[0] is not None:
+                    break
+                # チャンク境界をまたぐトークンのために末尾を残す
+                buf = buf[-_TAIL_BYTES:]
+
+        return next((channel_id for channel_id in found if channel_id), None)
     except:
         pass
     return None
@@ -6,23 +6,547 @@ Channel Video Processing Tool
 """
 
 import argparse
-import subprocess
+import csv
+import importlib
+import itertools
+import os
+import signal
 import sys
-from pathlib import Path
 import time
+from pathlib import Path
 import logging
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+# subprocess/tempfile/threading や各ステップのモジュールは使用する関数内でインポートし、
+# --help 等の起動を軽く保つ
+if TYPE_CHECKING:
+    import subprocess
+
+# 各ステップのスクリプト（--spawn-subprocess 時に使用）
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# --dry-run 時に再利用する既存CSVの有効期間（秒）
+DRY_RUN_CSV_MAX_AGE = 24 * 60 * 60
+
+
+class CachedTimeFormatter(logging.Formatter):
+    """日時文字列を秒単位でキャッシュするフォーマッタ
+
+    同じ秒のログでは strftime/localtime を呼ばず、ミリ秒部分だけを付け替える。
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_second = -1
+        self._cached_time = ''
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_second = second
+            self._cached_time = time.strftime(self.default_time_format, self.converter(record.created))
+        return self.default_msec_format % (self._cached_time, record.msecs)
 
 
 def setup_logging(verbose: bool = False):
     """ロギング設定"""
     log_level = logging.INFO if verbose else logging.WARNING
-    logging.basicConfig(
-        level=log_level,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(CachedTimeFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logging.basicConfig(level=log_level, handlers=[handler])
     return logging.getLogger(__name__)
 
 
+def build_index_argv(args: argparse.Namespace, csv_file: Path) -> List[str]:
+    """channel_index.py に渡す引数リストを組み立てる"""
+    argv: List[str] = []
+
+    if args.from_url:
+        argv.append('--from-url')
+    argv.append(args.channel_input)
+
+    argv.extend(['-o', str(csv_file)])
+
+    if args.verbose:
+        argv.append('-v')
+
+    return argv
+
+
+# yt_summary.py へ転送するオプション: (フラグ, 属性名, 種別)
+#   value          常に値付きで渡す
+#   optional_value 値が設定されている場合のみ渡す
+#   store_true     Trueの場合のみフラグだけを渡す
+_SUMMARY_FLAGS = (
+    # 出力・処理数
+    ('--outdir', 'outdir', 'value'),
+    ('--max-videos', 'max_videos', 'optional_value'),
+    # 文字起こし設定
+    ('--languages', 'languages', 'value'),
+    ('--clean-tags', 'clean_tags', 'store_true'),
+    ('--pretty-json', 'pretty_json', 'store_true'),
+    # AI設定
+    ('--provider', 'provider', 'value'),
+    ('--model', 'model', 'value'),
+    ('--fallback-model', 'fallback_model', 'optional_value'),
+    ('--fallback-provider', 'fallback_provider', 'optional_value'),
+    ('--chunk-chars', 'chunk_chars', 'value'),
+    ('--batch', 'batch', 'store_true'),
+    ('--pack-videos', 'pack_videos', 'value'),
+    ('--map-batch', 'map_batch', 'value'),
+    ('--no-ai-cache', 'no_ai_cache', 'store_true'),
+    # ネットワーク設定
+    ('--proxy', 'proxy', 'optional_value'),
+    ('--cookies-file', 'cookies_file', 'optional_value'),
+    ('--use-ytdlp', 'use_ytdlp', 'store_true'),
+    ('--rps', 'rps', 'value'),
+    ('--rpm', 'rpm', 'optional_value'),
+    ('--tpm', 'tpm', 'optional_value'),
+    # その他のオプション
+    ('--force', 'force', 'store_true'),
+    ('--dry-run', 'dry_run', 'store_true'),
+)
+
+
+def _emit_flag(flag: str, attr: str, kind: str, args: argparse.Namespace) -> Tuple[str, ...]:
+    """_SUMMARY_FLAGS の1項目を引数トークンに変換"""
+    value = getattr(args, attr)
+    if kind == 'store_true':
+        return (flag,) if value else ()
+    if kind == 'optional_value' and not value:
+        return ()
+    return (flag, str(value))
+
+
+def build_summary_argv(args: argparse.Namespace, input_args: List[str]) -> List[str]:
+    """yt_summary.py に渡す引数リストを組み立てる（input_argsは入力ソース指定）"""
+    return [*input_args,
+            *(token for spec in _SUMMARY_FLAGS for token in _emit_flag(*spec, args))]
+
+
+def script_command(args: argparse.Namespace, script: str, argv: List[str]) -> List[str]:
+    """子プロセスで script を実行するコマンドを組み立てる
+
+    PATH上の 'python' ではなく、このスクリプトを実行中のインタプリタ（または --python）を使う。
+    -X utf8 で子プロセスの標準入出力・ファイルの既定エンコーディングをOSに依らずUTF-8にする。
+    """
+    return [args.python, '-X', 'utf8', str(SCRIPT_DIR / script), *argv]
+
+
+def stop_processes(processes: List[Optional["subprocess.Popen"]], logger: logging.Logger,
+                   interrupt_timeout: float = 5, terminate_timeout: float = 2):
+    """子プロセスを段階的に停止（SIGINT → SIGTERM → SIGKILL）
+
+    まずSIGINTで後片付けの機会を与え、interrupt_timeout 秒以内に終了しなければSIGTERM、
+    さらに terminate_timeout 秒待っても残っていればSIGKILLで強制終了する。
+    """
+    import subprocess
+
+    running = [p for p in processes if p is not None and p.poll() is None]
+
+    def wait_all(timeout: float) -> List["subprocess.Popen"]:
+        deadline = time.monotonic() + timeout
+        remaining = []
+        for process in running:
+            try:
+                process.wait(timeout=max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                remaining.append(process)
+        return remaining
+
+    # WindowsではSIGINTを個別の子プロセスに送れないため、SIGTERMから始める
+    if os.name != 'nt':
+        for process in running:
+            process.send_signal(signal.SIGINT)
+        running = wait_all(interrupt_timeout)
+
+    for process in running:
+        process.terminate()
+    running = wait_all(terminate_timeout)
+
+    for process in running:
+        logger.warning(f"子プロセス (pid={process.pid}) を強制終了します")
+        process.kill()
+        process.wait()
+
+
+def prewarm_imports(modules: List[str]):
+    """重いモジュールをバックグラウンドスレッドで先にインポートしておく
+
+    ステップ1（ネットワーク待ちが中心）の間にインポートを済ませ、
+    同一プロセス内で呼び出すステップ2の起動を速くする。
+    """
+    import threading
+
+    def target():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass  # 実際に使用する時点で改めてエラーとして扱われる
+
+    threading.Thread(target=target, name='prewarm-imports', daemon=True).start()
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    """SIGTERMをKeyboardInterruptとして扱い、Ctrl-Cと同じ停止処理を通す"""
+    raise KeyboardInterrupt
+
+
+def run_index_step(argv: List[str], args: argparse.Namespace, logger: logging.Logger):
+    """ステップ1: channel_index を実行してCSVを生成"""
+    if args.spawn_subprocess:
+        import subprocess
+
+        cmd = script_command(args, 'channel_index.py', argv)
+        logger.info(f"実行コマンド: {' '.join(cmd)}")
+
+        try:
+            # 出力をメモリに溜めず、子プロセスから直接端末へ流す（標準出力は詳細表示時のみ）
+            subprocess.run(cmd, stdout=None if args.verbose else subprocess.DEVNULL,
+                           stderr=sys.stderr, check=True)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"channel_index.py の実行に失敗: {e}")
+            sys.exit(1)
+        # subprocess.run は子プロセスの終了まで待つため、CSVは書き込み済み（待機は不要）
+        return
+
+    # 同一プロセス内で直接呼び出す（インタプリタ起動・依存モジュールの再インポートが不要）
+    from channel_index import parse_args as parse_index_args, run as run_index
+
+    logger.info(f"channel_index を実行: {' '.join(argv)}")
+    try:
+        run_index(parse_index_args(argv))
+    except Exception as e:
+        logger.error(f"channel_index の実行に失敗: {e}")
+        sys.exit(1)
+
+
+def run_summary_step(argv: List[str], args: argparse.Namespace, logger: logging.Logger):
+    """ステップ2: yt_summary を実行して文字起こし・要約"""
+    if args.spawn_subprocess:
+        import subprocess
+
+        cmd = script_command(args, 'yt_summary.py', argv)
+        logger.info(f"実行コマンド: {' '.join(cmd)}")
+
+        process = None
+        try:
+            # yt_summary.py はリアルタイムで出力を表示
+            process = subprocess.Popen(cmd, stdout=sys.stdout, stderr=sys.stderr)
+            process.wait()
+
+            if process.returncode != 0:
+                logger.error(f"yt_summary.py がエラーコード {process.returncode} で終了")
+                sys.exit(process.returncode)
+
+        except KeyboardInterrupt:
+            logger.info("処理を中断しました")
+            stop_processes([process], logger)
+            sys.exit(130)
+        except Exception as e:
+            logger.error(f"処理中にエラーが発生: {e}")
+            sys.exit(1)
+        return
+
+    from yt_summary import parse_args as parse_summary_args, run as run_summary
+
+    logger.info(f"yt_summary を実行: {' '.join(argv)}")
+    try:
+        run_summary(parse_summary_args(argv))
+    except KeyboardInterrupt:
+        logger.info("処理を中断しました")
+        sys.exit(130)
+    except Exception as e:
+        logger.error(f"処理中にエラーが発生: {e}")
+        sys.exit(1)
+
+
+def count_csv_videos(csv_file: Path, limit: Optional[int] = None) -> Optional[int]:
+    """CSVのヘッダーを検証し、動画の行数を返す（limit指定時はその件数で打ち切る）
+
+    video_id または url 列がない場合は None を返す。
+    """
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None or not {'video_id', 'url'} & set(header):
+            return None
+        return sum(1 for row in itertools.islice(reader, limit) if any(row))
+
+
+def summary_video_limit(csv_file: Path, args: argparse.Namespace) -> Optional[int]:
+    """yt_summary.py が適用する動画数の上限（--max-videos 未指定時は yt_summary.py の既定値）"""
+    from yt_summary import parse_args as parse_summary_args
+
+    return parse_summary_args(
+        build_summary_argv(args, ['--video-ids-file', str(csv_file)])).max_videos or None
+
+
+def filter_cached_videos(csv_file: Path, args: argparse.Namespace, tmpdir: Path,
+                         logger: logging.Logger) -> Optional[Path]:
+    """同じ設定（言語・プロバイダー・モデル・チャンクサイズ・プロンプト）で要約済みの動画をCSVから除外
+
+    結果キャッシュ（outdir/.cache.sqlite）を参照し、未処理の動画だけを書き出した
+    一時CSVのパスを返す。除外対象がなければ csv_file をそのまま返し、
+    全件がキャッシュ済みの場合は None を返す。
+    --max-videos はキャッシュ除外の前に適用する（CSV先頭のN件のうち未処理のものだけを処理）。
+    """
+    from result_cache import ResultCache
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    cache = ResultCache(outdir / ResultCache.FILENAME)
+    try:
+        evicted = cache.evict_older_than(args.cache_ttl_days)
+        if evicted:
+            logger.info(f"{args.cache_ttl_days}日以上使われていないキャッシュを {evicted} 件削除")
+
+        if args.force or csv_file.suffix.lower() != '.csv':
+            return csv_file
+
+        key = ResultCache.key(args)
+        done = cache.completed(key)
+        if not done:
+            return csv_file
+
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None or 'video_id' not in header:
+                return csv_file
+            id_column = header.index('video_id')
+
+            rows: List[List[str]] = []
+            cached: List[str] = []
+            for row in itertools.islice(reader, summary_video_limit(csv_file, args)):
+                video_id = row[id_column] if len(row) > id_column else ''
+                # 要約ファイルが削除されている場合は再処理する
+                summary_path = done.get(video_id)
+                if summary_path and Path(summary_path).exists():
+                    cached.append(video_id)
+                else:
+                    rows.append(row)
+
+        if not cached:
+            return csv_file
+
+        cache.touch(cached, key)
+        logger.info(f"要約済みの {len(cached)} 件をスキップ（--force で再処理）")
+        if not rows:
+            return None
+
+        trimmed_file = tmpdir / csv_file.name
+        with open(trimmed_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return trimmed_file
+    finally:
+        cache.close()
+
+
+def merge_index_files(target: Path, sources: List[Path]):
+    """ワーカーごとのインデックスCSVを target に統合し、統合元を削除する
+
+    同じ動画IDは後に読み込んだ行（ワーカーの最新結果）で上書きする。
+    """
+    rows: Dict[str, Dict[str, str]] = {}
+    fieldnames: Optional[List[str]] = None
+    for path in [target, *sources]:
+        if not path.exists():
+            continue
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            if fieldnames is None and reader.fieldnames:
+                fieldnames = list(reader.fieldnames)
+            for row in reader:
+                rows[row['video_id']] = row
+
+    if fieldnames is not None:
+        with open(target, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows.values())
+
+    for path in sources:
+        path.unlink(missing_ok=True)
+
+
+def seed_worker_indexes(base_index: Path, index_files: List[Path], shards: List[Set[str]]):
+    """既存の base_index から各ワーカーの担当動画の行を、ワーカーのインデックスファイルへ書き出す
+
+    ワーカーは自分のインデックスファイルしか読まないため、種を入れないと既存の
+    言語や transcript_hash を知らずに処理し、統合時にそれらを空の値で上書きしてしまう。
+    """
+    rows: List[List[str]] = []
+    header: Optional[List[str]] = None
+    if base_index.exists():
+        with open(base_index, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            rows = list(reader)
+
+    for index_file, shard in zip(index_files, shards):
+        index_file.unlink(missing_ok=True)
+        if header is None or 'video_id' not in header:
+            continue
+        id_column = header.index('video_id')
+        shard_rows = [row for row in rows if len(row) > id_column and row[id_column] in shard]
+        if shard_rows:
+            with open(index_file, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(shard_rows)
+
+
+def run_summary_workers(csv_file: Path, args: argparse.Namespace, logger: logging.Logger):
+    """ステップ2を複数の yt_summary.py プロセスで並列実行
+
+    CSVの動画をラウンドロビンでワーカー数に分割し、各プロセスには --rps（と --rpm/--tpm）を等分して渡す
+    （全体のリクエストレートは単一プロセス時と同じ）。各プロセスは個別のインデックス
+    ファイルへ書き込み、全プロセスの終了後に outdir/index.csv へ統合する。
+    """
+    import subprocess
+    import tempfile
+
+    # 単一プロセス時と同じ上限を全体に適用
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        rows = list(itertools.islice(reader, summary_video_limit(csv_file, args)))
+
+    if header is None or not rows:
+        logger.warning(f"処理対象の動画がありません: {csv_file}")
+        return
+
+    workers = min(args.workers, len(rows))
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    worker_args = argparse.Namespace(**{**vars(args), 'rps': args.rps / workers,
+                                        'rpm': args.rpm and args.rpm / workers,
+                                        'tpm': args.tpm and args.tpm / workers,
+                                        'max_videos': None})
+    index_files = [outdir / f"index.worker{i}.csv" for i in range(workers)]
+    # 既存の index.csv の行を担当ワーカーへ引き継ぐ（video_id 列のあるCSVのみ）
+    shards: List[Set[str]] = [set() for _ in range(workers)]
+    if 'video_id' in header:
+        id_column = header.index('video_id')
+        for i, row in enumerate(rows):
+            if len(row) > id_column:
+                shards[i % workers].add(row[id_column])
+    seed_worker_indexes(outdir / "index.csv", index_files, shards)
+
+    logger.info(f"{len(rows)} 件の動画を {workers} プロセスで並列処理")
+
+    processes: List["subprocess.Popen"] = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            for i, index_file in enumerate(index_files):
+                shard_rows = rows[i::workers]
+                shard_file = Path(tmpdir) / f"shard_{i}.csv"
+                with open(shard_file, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(header)
+                    writer.writerows(shard_rows)
+
+                argv = build_summary_argv(worker_args, ['--video-ids-file', str(shard_file)])
+                argv.extend(['--max-videos', str(len(shard_rows)),
+                             '--index-file', str(index_file)])
+                cmd = script_command(args, 'yt_summary.py', argv)
+                logger.info(f"実行コマンド: {' '.join(cmd)}")
+                processes.append(subprocess.Popen(cmd, stdout=sys.stdout, stderr=sys.stderr))
+
+            for process in processes:
+                process.wait()
+
+        except KeyboardInterrupt:
+            logger.info("処理を中断しました")
+            stop_processes(processes, logger)
+            sys.exit(130)
+        finally:
+            # 中断時も途中までの結果を残す
+            merge_index_files(outdir / "index.csv", index_files)
+
+    returncode = max(process.returncode for process in processes)
+    if returncode != 0:
+        logger.error(f"yt_summary.py がエラーコード {returncode} で終了")
+        sys.exit(returncode)
+
+
+def run_pipeline(index_argv: List[str], summary_argv: List[str],
+                 args: argparse.Namespace, logger: logging.Logger):
+    """ステップ1と2をパイプで接続して並行実行
+
+    channel_index.py --stream-ids が見つけた動画を順次 yt_summary.py --video-ids-stdin
+    へ流すため、一覧の取得完了を待たずに文字起こし・要約が始まる。CSVも通常どおり出力される。
+    """
+    import subprocess
+
+    index_cmd = script_command(args, 'channel_index.py', [*index_argv, '--stream-ids'])
+    summary_cmd = script_command(args, 'yt_summary.py', summary_argv)
+    logger.info(f"実行コマンド: {' '.join(index_cmd)} | {' '.join(summary_cmd)}")
+
+    index_proc = None
+    summary_proc = None
+    try:
+        index_proc = subprocess.Popen(index_cmd, stdout=subprocess.PIPE)
+        summary_proc = subprocess.Popen(summary_cmd, stdin=index_proc.stdout,
+                                        stdout=sys.stdout, stderr=sys.stderr)
+        # 親プロセス側の読み口を閉じ、yt_summary.py の終了がchannel_index.pyに伝わるようにする
+        if index_proc.stdout is not None:
+            index_proc.stdout.close()
+
+        summary_proc.wait()
+        index_proc.wait()
+
+    except KeyboardInterrupt:
+        logger.info("処理を中断しました")
+        stop_processes([summary_proc, index_proc], logger)
+        sys.exit(130)
+    except Exception as e:
+        logger.error(f"処理中にエラーが発生: {e}")
+        sys.exit(1)
+
+    if index_proc.returncode != 0:
+        logger.error(f"channel_index.py がエラーコード {index_proc.returncode} で終了")
+        sys.exit(1)
+    if summary_proc.returncode != 0:
+        logger.error(f"yt_summary.py がエラーコード {summary_proc.returncode} で終了")
+        sys.exit(summary_proc.returncode)
+
+
+def dry_run(args: argparse.Namespace, csv_file: Path, logger: logging.Logger):
+    """実際の処理を行わずに実行計画を表示
+
+    チャンネル一覧の取得（ステップ1）は実行しない。CSVが使える場合（--use-existing-csv、
+    または24時間以内に生成された --csv-output）は、yt_summary の dry-run で処理対象を表示する。
+    どちらの場合も子プロセスは起動しない。
+    """
+    summary_argv = build_summary_argv(args, ['--video-ids-file', str(csv_file)])
+
+    if not args.use_existing_csv:
+        if csv_file.exists() and time.time() - csv_file.stat().st_mtime < DRY_RUN_CSV_MAX_AGE:
+            logger.info(f"DRY: 既存のCSVを再利用: {csv_file}")
+        else:
+            index_cmd = script_command(args, 'channel_index.py', build_index_argv(args, csv_file))
+            print(f"DRY: ステップ1: {' '.join(index_cmd)}")
+            print(f"DRY: ステップ2: {' '.join(script_command(args, 'yt_summary.py', summary_argv))}")
+            return
+
+    if not csv_file.exists():
+        logger.error(f"CSVファイルが見つかりません: {csv_file}")
+        sys.exit(1)
+
+    print(f"DRY: ステップ2: {' '.join(script_command(args, 'yt_summary.py', summary_argv))}")
+
+    # yt_summary の dry-run はCSVと既存のインデックスを読むだけなので同一プロセス内で実行
+    from yt_summary import parse_args as parse_summary_args, run as run_summary
+    run_summary(parse_summary_args(summary_argv))
+
+
 def main():
     """メインエントリーポイント"""
     parser = argparse.ArgumentParser(
@@ -45,6 +569,12 @@ def main():
   # AI プロバイダーとモデルを指定
   python process_channel.py UC_x5XG1OV2P6uZZ5FSM9Ttw --provider openai --model gpt-4-turbo
 
+  # 4プロセスで並列に要約処理（--rps は全体の上限）
+  python process_channel.py UC_x5XG1OV2P6uZZ5FSM9Ttw --workers 4
+
+  # 動画一覧の取得と要約処理を並行実行
+  python process_channel.py UC_x5XG1OV2P6uZZ5FSM9Ttw --pipeline
+
   # プロキシとCookies使用（IPブロック回避）
   python process_channel.py UC_x5XG1OV2P6uZZ5FSM9Ttw --proxy http://proxy:8080 --cookies-file cookies.txt
 
@@ -69,6 +599,8 @@ def main():
                        help='処理する最大動画数')
     parser.add_argument('--force', action='store_true',
                        help='既存のファイルを強制的に再生成')
+    parser.add_argument('--cache-ttl-days', type=float, default=30,
+                       help='要約結果キャッシュの保持日数。この期間使われなかったエントリーは削除 (default: 30)')
     parser.add_argument('--dry-run', action='store_true',
                        help='実際の処理を行わずに処理対象を表示')
 
@@ -77,6 +609,8 @@ def main():
                        help='優先言語順 (default: ja,ja-JP,en)')
     parser.add_argument('--clean-tags', action='store_true',
                        help='文字起こしから[タグ]を削除')
+    parser.add_argument('--pretty-json', action='store_true',
+                       help='文字起こしのJSONをインデント付きで保存（デフォルトはコンパクト形式）')
     parser.add_argument('--use-ytdlp', action='store_true',
                        help='yt-dlpを使用（IPブロック回避に有効）')
 
@@ -85,131 +619,118 @@ def main():
                        default='anthropic', help='AIプロバイダー (default: anthropic)')
     parser.add_argument('--model', default='claude-3-5-sonnet-latest',
                        help='モデル名 (default: claude-3-5-sonnet-latest)')
+    parser.add_argument('--fallback-model',
+                       help='AI呼び出しが失敗したときに再試行するモデル')
+    parser.add_argument('--fallback-provider', choices=['anthropic', 'openai'],
+                       help='--fallback-model のプロバイダー (default: --provider と同じ)')
     parser.add_argument('--chunk-chars', type=int, default=6000,
                        help='map-reduce時のチャンクサイズ (default: 6000)')
+    parser.add_argument('--batch', action='store_true',
+                       help='最終要約をプロバイダーのバッチAPIでまとめて実行（約半額、最大24時間）')
+    parser.add_argument('--no-ai-cache', action='store_true',
+                       help='保存済みのAI応答を再利用せず常にAPIを呼び出す')
+    parser.add_argument('--pack-videos', type=int, default=1, metavar='K',
+                       help='短い動画をK本まで1回のAI呼び出しでまとめて要約 (default: 1)')
+    parser.add_argument('--map-batch', type=int, default=1, metavar='K',
+                       help='長い動画のチャンクをK個まで1回のAI呼び出しで要約 (default: 1)')
 
     # ネットワークオプション
     parser.add_argument('--proxy', help='HTTP/HTTPSプロキシURL')
     parser.add_argument('--cookies-file', help='YouTube認証用cookies.txtファイル')
     parser.add_argument('--rps', type=float, default=0.8,
                        help='リクエスト/秒の制限 (default: 0.8)')
+    parser.add_argument('--rpm', type=float,
+                       help='AI呼び出しの1分あたりリクエスト数の上限（指定時はAI呼び出しに --rps の代わりに適用）')
+    parser.add_argument('--tpm', type=float,
+                       help='AI呼び出しの1分あたりトークン数の上限（プロンプト推定+最大出力）')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='要約処理を並列実行するプロセス数。--rps は全プロセスの合計 (default: 1)')
 
     # その他
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='詳細な出力を表示')
     parser.add_argument('--csv-output', default='index.csv',
                        help='CSVファイル名 (default: index.csv)')
+    parser.add_argument('--spawn-subprocess', action='store_true',
+                       help='各ステップを同一プロセス内ではなく別プロセスで実行（従来の動作）')
+    parser.add_argument('--no-prewarm', dest='prewarm', action='store_false',
+                       help='ステップ1の実行中に要約処理のモジュールを先読みしない')
+    parser.add_argument('--python', default=sys.executable,
+                       help='子プロセスの実行に使うPythonインタプリタ (default: 実行中のインタプリタ)')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='動画一覧の取得と要約処理をパイプで接続し並行実行（--use-existing-csv 時は無効）')
 
     args = parser.parse_args()
     logger = setup_logging(args.verbose)
 
+    # kill <pid> でも子プロセスを残さず停止する
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
     # 引数チェック
     if not args.use_existing_csv and not args.channel_input:
         parser.error("channel_input または --use-existing-csv が必要です")
+    if args.workers < 1:
+        parser.error("--workers は1以上を指定してください")
+    if args.workers > 1 and args.pipeline:
+        parser.error("--workers と --pipeline は同時に指定できません")
 
     # CSVファイルのパス
     csv_file = Path(args.use_existing_csv if args.use_existing_csv else args.csv_output)
 
-    # ステップ1: CSVファイル生成（必要な場合）
-    if not args.use_existing_csv:
-        logger.info("Step 1: チャンネル動画リストを取得中...")
-
-        # channel_index.py を実行
-        cmd = ['python', 'channel_index.py']
-
-        if args.from_url:
-            cmd.append('--from-url')
-        cmd.append(args.channel_input)
-
-        cmd.extend(['-o', str(csv_file)])
-
-        if args.verbose:
-            cmd.append('-v')
-
-        logger.info(f"実行コマンド: {' '.join(cmd)}")
-
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            if args.verbose:
-                print(result.stdout)
-            if result.stderr:
-                print(result.stderr, file=sys.stderr)
-        except subprocess.CalledProcessError as e:
-            logger.error(f"channel_index.py の実行に失敗: {e}")
-            if e.stdout:
-                print(e.stdout)
-            if e.stderr:
-                print(e.stderr, file=sys.stderr)
-            sys.exit(1)
-
-        logger.info(f"CSVファイルを生成: {csv_file}")
-        time.sleep(1)  # 少し待機
-
-    # CSVファイルの存在確認
-    if not csv_file.exists():
-        logger.error(f"CSVファイルが見つかりません: {csv_file}")
-        sys.exit(1)
-
-    # ステップ2: 文字起こし・要約処理
-    logger.info("Step 2: 文字起こしと要約処理を実行中...")
-
-    # yt_summary.py を実行
-    cmd = ['python', 'yt_summary.py', '--video-ids-file', str(csv_file)]
-
-    # 出力ディレクトリ
-    cmd.extend(['--outdir', args.outdir])
-
-    # 処理数制限
-    if args.max_videos:
-        cmd.extend(['--max-videos', str(args.max_videos)])
-
-    # 言語設定
-    cmd.extend(['--languages', args.languages])
-
-    # タグクリーン
-    if args.clean_tags:
-        cmd.append('--clean-tags')
-
-    # AI設定
-    cmd.extend(['--provider', args.provider])
-    cmd.extend(['--model', args.model])
-    cmd.extend(['--chunk-chars', str(args.chunk_chars)])
-
-    # ネットワーク設定
-    if args.proxy:
-        cmd.extend(['--proxy', args.proxy])
-    if args.cookies_file:
-        cmd.extend(['--cookies-file', args.cookies_file])
-    if args.use_ytdlp:
-        cmd.append('--use-ytdlp')
-    cmd.extend(['--rps', str(args.rps)])
-
-    # その他のオプション
-    if args.force:
-        cmd.append('--force')
+    # ドライランは実行計画のみ表示して終了
     if args.dry_run:
-        cmd.append('--dry-run')
-
-    logger.info(f"実行コマンド: {' '.join(cmd)}")
-
-    process = None
-    try:
-        # yt_summary.py はリアルタイムで出力を表示
-        process = subprocess.Popen(cmd, stdout=sys.stdout, stderr=sys.stderr)
-        process.wait()
-
-        if process.returncode != 0:
-            logger.error(f"yt_summary.py がエラーコード {process.returncode} で終了")
-            sys.exit(process.returncode)
+        dry_run(args, csv_file, logger)
+        return
+
+    # ステップ2を同一プロセス内で実行する場合は、ステップ1の間に依存モジュールを読み込んでおく
+    in_process_summary = not (args.spawn_subprocess or args.pipeline or args.workers > 1)
+    if args.prewarm and in_process_summary:
+        prewarm_imports(['yt_summary', args.provider])
+
+    if args.pipeline and not args.use_existing_csv:
+        # ステップ1・2: 動画一覧の取得と文字起こし・要約を並行実行
+        logger.info("Step 1+2: 動画リストの取得と文字起こし・要約をパイプラインで実行中...")
+        run_pipeline(build_index_argv(args, csv_file),
+                     build_summary_argv(args, ['--video-ids-stdin']), args, logger)
+    else:
+        # ステップ1: CSVファイル生成（必要な場合）
+        if not args.use_existing_csv:
+            logger.info("Step 1: チャンネル動画リストを取得中...")
+
+            run_index_step(build_index_argv(args, csv_file), args, logger)
+
+            logger.info(f"CSVファイルを生成: {csv_file}")
+
+        # CSVファイルの存在確認
+        if not csv_file.exists():
+            logger.error(f"CSVファイルが見つかりません: {csv_file}")
+            sys.exit(1)
 
-    except KeyboardInterrupt:
-        logger.info("処理を中断しました")
-        if process is not None:
-            process.terminate()
-        sys.exit(130)
-    except Exception as e:
-        logger.error(f"処理中にエラーが発生: {e}")
-        sys.exit(1)
+        # 空・不正なCSVの場合は要約処理を起動せずに終了
+        if csv_file.suffix.lower() == '.csv':
+            video_count = count_csv_videos(csv_file, args.max_videos)
+            if video_count is None:
+                logger.error(f"CSVファイルに video_id 列（または url 列）がありません: {csv_file}")
+                sys.exit(2)
+            if video_count == 0:
+                logger.error(f"CSVファイルに動画がありません: {csv_file}")
+                sys.exit(2)
+            logger.info(f"処理対象: {video_count} 件")
+
+        # ステップ2: 文字起こし・要約処理
+        logger.info("Step 2: 文字起こしと要約処理を実行中...")
+
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmpdir:
+            # 前回までに要約済みの動画を除外
+            summary_csv = filter_cached_videos(csv_file, args, Path(tmpdir), logger)
+            if summary_csv is None:
+                logger.info("すべての動画が要約済みです")
+            elif args.workers > 1:
+                run_summary_workers(summary_csv, args, logger)
+            else:
+                run_summary_step(build_summary_argv(args, ['--video-ids-file', str(summary_csv)]),
+                                 args, logger)
 
     logger.info("処理が完了しました")
     logger.info(f"結果は {args.outdir} ディレクトリに保存されています")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Prompt templates for yt_summary.py
+
+Templates are filled with str.format. PROMPT_HASH covers only these
+templates, so editing a log message or docstring elsewhere does not
+invalidate cached summaries.
+"""
+
+import hashlib
+
+# Map phase: key points of one chunk
+CHUNK_PROMPT = """以下のテキストは、YouTubeの動画の文字起こしの一部（{index}/{total}）です。
+重要なポイントを箇条書きで3-5個抽出してください。
+
+テキスト:
+{text}
+
+重要ポイント（箇条書き）:"""
+
+# Map phase with --map-batch: key points of several consecutive chunks
+CHUNK_BATCH_SECTION = "### SECTION {index}\n{text}"
+CHUNK_BATCH_PROMPT = """以下のテキストは、YouTubeの動画の文字起こしの一部（全{total}セクション中の{first}〜{last}番目）です。各セクションは「### SECTION <番号>」で始まります。
+セクションごとに、重要なポイントを箇条書きで3-5個抽出してください。
+
+{sections}
+
+各セクションの重要ポイント（箇条書き）を、セクションの順に1セクション1要素の配列として以下のJSON形式で回答してください:
+{{"sections": ["セクション{first}の重要ポイント（箇条書き）", ...]}}"""
+
+# Final structured summary, from the whole transcript or the map-phase points
+REDUCED_CONTEXT = "以下は動画の各セクションから抽出された重要ポイントのリストです。"
+TRANSCRIPT_CONTEXT = "以下は動画の完全な文字起こしです。"
+FINAL_SUMMARY_PROMPT = """{context}
+これを元に、以下の形式で日本語の要約を作成してください。
+
+タイトル: {title}
+
+{content}
+
+以下のJSON形式で回答してください:
+{{
+  "summary": "1段落の要約（TL;DR）。会話の文脈や流れを踏まえた内容の本質を200文字程度で",
+  "highlights": ["重要ポイント1", "重要ポイント2", ...],  // 最大10個
+  "new_insights": ["会話から得られる新しい気づき1", ...],  // 3-5個、会話の相互作用から生まれる示唆
+  "notable_quotes": [{{"t": "MM:SS", "text": "印象的な発言"}}, ...]  // 2-3個、時間は推定で可
+}}"""
+
+# Final summaries of several short videos at once (--pack-videos)
+PACKED_VIDEO_SECTION = "### VIDEO {video_id}\nタイトル: {title}\n\n{text}"
+PACKED_SUMMARY_PROMPT = """以下は複数のYouTube動画の完全な文字起こしです。各動画は「### VIDEO <動画ID>」で始まります。
+動画ごとに独立して、以下の形式で日本語の要約を作成してください。
+
+{videos}
+
+動画IDをキーとする以下のJSON形式で回答してください:
+{{
+  "<動画ID>": {{
+    "summary": "1段落の要約（TL;DR）。会話の文脈や流れを踏まえた内容の本質を200文字程度で",
+    "highlights": ["重要ポイント1", "重要ポイント2", ...],  // 最大10個
+    "new_insights": ["会話から得られる新しい気づき1", ...],  // 3-5個、会話の相互作用から生まれる示唆
+    "notable_quotes": [{{"t": "MM:SS", "text": "印象的な発言"}}, ...]  // 2-3個、時間は推定で可
+  }},
+  ...
+}}"""
+
+# Changes whenever a template above is edited, so cached results produced
+# with an older prompt are not reused
+PROMPT_HASH = hashlib.sha256('\0'.join((
+    CHUNK_PROMPT, CHUNK_BATCH_SECTION, CHUNK_BATCH_PROMPT, REDUCED_CONTEXT, TRANSCRIPT_CONTEXT,
+    FINAL_SUMMARY_PROMPT, PACKED_VIDEO_SECTION, PACKED_SUMMARY_PROMPT,
+)).encode('utf-8')).hexdigest()[:16]
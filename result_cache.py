@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Result cache shared by yt_summary.py and process_channel.py
+
+Kept free of third-party imports so process_channel.py can skip cached
+videos without loading the whole summary tool.
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from prompts import PROMPT_HASH
+
+
+class ResultCache:
+    """Persistent cache of completed summaries, shared across runs
+
+    Rows are keyed by video ID plus everything that shapes the summary
+    (transcript languages, provider, model, chunk size and a hash of the
+    prompt text), so changing any of them makes the video eligible again.
+
+    The same database also keeps raw AI responses keyed by a hash of the
+    exact request, so --force reruns and restarts don't pay for identical
+    prompts twice.
+    """
+
+    FILENAME = ".cache.sqlite"
+
+    def __init__(self, path: Path):
+        # Results are recorded from worker threads (serialized by the caller)
+        self.conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        # WAL lets parallel workers record results without blocking readers
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS done (
+                video_id TEXT NOT NULL,
+                languages TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                chunk_chars INTEGER NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                transcript_lang TEXT,
+                transcript_path TEXT,
+                summary_path TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (video_id, languages, provider, model, chunk_chars, prompt_hash)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS done_updated_at ON done (updated_at)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                request_hash TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_updated_at ON responses (updated_at)")
+        self.conn.commit()
+        # AI responses are looked up and stored from many workers at once
+        self._responses_lock = threading.Lock()
+
+    @staticmethod
+    def key(args: argparse.Namespace) -> Tuple[str, str, str, int, str]:
+        """Cache key for the settings in args (everything except the video ID)"""
+        return (args.languages, args.provider, args.model, args.chunk_chars, PROMPT_HASH)
+
+    def completed(self, key: Tuple[str, str, str, int, str]) -> Dict[str, str]:
+        """Return {video_id: summary_path} for videos already summarized with key"""
+        cursor = self.conn.execute("""
+            SELECT video_id, summary_path FROM done
+            WHERE languages = ? AND provider = ? AND model = ? AND chunk_chars = ? AND prompt_hash = ?
+        """, key)
+        return dict(cursor.fetchall())
+
+    def record(self, video_id: str, key: Tuple[str, str, str, int, str],
+               transcript_lang: str, transcript_path: Path, summary_path: Path):
+        """Record a completed summary"""
+        with self.conn:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO done VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (video_id, *key, transcript_lang, str(transcript_path), str(summary_path), time.time()))
+
+    def summary_path(self, video_id: str, key: Tuple[str, str, str, int, str]) -> Optional[str]:
+        """Return the summary path recorded for video_id under key, if any"""
+        row = self.conn.execute("""
+            SELECT summary_path FROM done
+            WHERE video_id = ? AND languages = ? AND provider = ? AND model = ?
+              AND chunk_chars = ? AND prompt_hash = ?
+        """, (video_id, *key)).fetchone()
+        return row[0] if row else None
+
+    def touch(self, video_ids: Iterable[str], key: Tuple[str, str, str, int, str]):
+        """Mark cached entries as used so eviction drops the least recently used first"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany("""
+                UPDATE done SET updated_at = ?
+                WHERE video_id = ? AND languages = ? AND provider = ? AND model = ?
+                  AND chunk_chars = ? AND prompt_hash = ?
+            """, ((now, video_id, *key) for video_id in video_ids))
+
+    @staticmethod
+    def request_hash(provider: str, model: str, max_tokens: int, prompt: str) -> str:
+        """Hash identifying one AI request"""
+        return hashlib.blake2b(f"{provider}|{model}|{max_tokens}|{prompt}".encode('utf-8'),
+                               digest_size=20).hexdigest()
+
+    def response(self, request_hash: str) -> Optional[str]:
+        """Return the stored AI response for request_hash, if any"""
+        with self._responses_lock, self.conn:
+            row = self.conn.execute("SELECT response FROM responses WHERE request_hash = ?",
+                                    (request_hash,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE responses SET updated_at = ? WHERE request_hash = ?",
+                              (time.time(), request_hash))
+        return row[0]
+
+    def store_response(self, request_hash: str, response: str):
+        """Store an AI response"""
+        with self._responses_lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                              (request_hash, response, time.time()))
+
+    def evict_older_than(self, days: float) -> int:
+        """Delete entries not used within the last days; return how many were removed"""
+        cutoff = time.time() - days * 86400
+        with self._responses_lock, self.conn:
+            cursor = self.conn.execute("DELETE FROM done WHERE updated_at < ?", (cutoff,))
+            self.conn.execute("DELETE FROM responses WHERE updated_at < ?", (cutoff,))
+        return cursor.rowcount
+
+    def close(self):
+        self.conn.close()
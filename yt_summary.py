@@ -8,30 +8,190 @@ Supports batch processing with incremental updates.
 
 import argparse
 import csv
-import json
+import hashlib
+import itertools
 import logging
+import mmap
 import os
 import re
+import sys
+import threading
 import time
-import xml.etree.ElementTree as ET
-from dataclasses import dataclass, asdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+import orjson
+from lxml import etree
+from tenacity import (retry, retry_if_exception_type, stop_after_attempt, wait_exponential,
+                      wait_random_exponential)
 from tqdm import tqdm  # type: ignore[import-untyped]
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound, IpBlocked
-import subprocess
-import tempfile
 from dotenv import load_dotenv
 
+from prompts import (CHUNK_BATCH_PROMPT, CHUNK_BATCH_SECTION, CHUNK_PROMPT, FINAL_SUMMARY_PROMPT,
+                     PACKED_SUMMARY_PROMPT, PACKED_VIDEO_SECTION, REDUCED_CONTEXT, TRANSCRIPT_CONTEXT)
+from result_cache import ResultCache
+
+# jiter (installed with the anthropic/openai SDKs) can salvage truncated JSON
+try:
+    import jiter
+    HAS_JITER = True
+except ImportError:
+    jiter = None  # type: ignore[assignment]
+    HAS_JITER = False
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Patterns used per transcript segment/line, compiled once
+_VIDEO_ID_RE = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+_BRACKET_RE = re.compile(r'\[[^\]]*\]')  # [音楽], [拍手] etc.
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_STYLE_TAG_RE = re.compile(r'\{[^}]+\}')
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+# A VTT cue: "HH:MM:SS.mmm --> HH:MM:SS.mmm [settings]" followed by its text
+# lines, up to the first blank line or the next timestamp line
+_VTT_CUE_RE = re.compile(
+    r'^[ \t]*(\d{2}:\d{2}:\d{2}[.,]\d{3})[ \t]*-->[ \t]*(\d{2}:\d{2}:\d{2}[.,]\d{3})[^\n]*\n'
+    r'((?:(?![^\n]* --> )[ \t\r]*\S[^\n]*(?:\n|\Z))*)',
+    re.MULTILINE)
+
+
+def _strip_tags(text: str) -> str:
+    """Remove bracketed tags such as [音楽] and surrounding whitespace
+
+    Most segments have no tag, so the regex only runs when a '[' is present.
+    """
+    if '[' in text:
+        text = _BRACKET_RE.sub('', text)
+    return text.strip()
+
+
+def _vtt_seconds(ts: str) -> float:
+    """Convert a fixed-width VTT timestamp (HH:MM:SS.mmm or HH:MM:SS,mmm) to seconds"""
+    return int(ts[0:2]) * 3600 + int(ts[3:5]) * 60 + int(ts[6:8]) + int(ts[9:12]) / 1000
+
+
+@lru_cache(maxsize=4096)
+def _published_date(published_at: str) -> str:
+    """YYYY-MM-DD for an ISO 8601 timestamp, or the value unchanged if it isn't one"""
+    try:
+        # Python 3.11+ accepts a trailing 'Z'; older versions need an explicit offset
+        dt = datetime.fromisoformat(published_at)
+    except ValueError:
+        try:
+            dt = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
+        except ValueError:
+            return published_at
+    return dt.strftime('%Y-%m-%d')
+
+
+def _read_mapped(path: Path, decode: Callable[[Any], Any]) -> Any:
+    """Run decode over a read-only memory map of path
+
+    The parser reads straight from the page cache instead of from an
+    intermediate bytes copy of the whole file.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:  # empty files can't be mapped
+            return decode(b'')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return decode(view)
+
+
+def _read_json(path: Path) -> Any:
+    """Load a JSON file"""
+    return _read_mapped(path, orjson.loads)
+
+
+def _read_text(path: Path) -> str:
+    """Load a UTF-8 text file"""
+    return _read_mapped(path, lambda buf: str(buf, 'utf-8'))
+
+
+def _write_bytes(path: Path, data: bytes) -> bool:
+    """Atomically replace path with data unless it already holds exactly that
+
+    Returns False when the write was skipped. A size mismatch settles most
+    cases without reading the file; the rename means an interrupted run never
+    leaves a truncated file behind.
+    """
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+_JSON_TYPES = {'object': dict, 'array': list, 'string': str}
+
+
+def _schema_type_errors(value: Any, schema: Dict[str, Any], path: str = '$') -> List[str]:
+    """Check value against the subset of JSON schema that SUMMARY_SCHEMA uses
+
+    Covers type, properties and items. Missing and extra keys are tolerated,
+    since a truncated answer keeps only its complete fields and the summary
+    builder fills in defaults. Returns the problems found, empty when valid.
+    """
+    expected = schema['type']
+    if not isinstance(value, _JSON_TYPES[expected]):
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+    errors: List[str] = []
+    if expected == 'object':
+        for key, subschema in schema.get('properties', {}).items():
+            if key in value:
+                errors.extend(_schema_type_errors(value[key], subschema, f"{path}.{key}"))
+    elif expected == 'array':
+        for i, item in enumerate(value):
+            errors.extend(_schema_type_errors(item, schema['items'], f"{path}[{i}]"))
+    return errors
+
+
+def _loads_ai_json(response: str) -> Any:
+    """Parse a model's JSON answer, tolerating text or code fences around it
+
+    An answer cut off at max_tokens keeps its complete fields when jiter is
+    available. Raises ValueError when nothing can be recovered.
+    """
+    try:
+        return orjson.loads(response)
+    except orjson.JSONDecodeError:
+        pass
+    start = response.find('{')
+    if start < 0:
+        raise ValueError("no JSON object in response")
+    end = response.rfind('}')
+    if end > start:
+        try:
+            return orjson.loads(response[start:end + 1])
+        except orjson.JSONDecodeError:
+            pass
+    if HAS_JITER:
+        return jiter.from_json(response[start:].encode('utf-8'), partial_mode='trailing-strings')
+    raise ValueError("response is not valid JSON")
+
+
+def _write_json(path: Path, obj: Any, indent: bool = True):
+    """Write obj as UTF-8 JSON (dataclasses are serialized natively)
+
+    indent=False writes compact JSON, for large machine-read files.
+    """
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    _write_bytes(path, orjson.dumps(obj, option=option))
+
 
 @dataclass
 class VideoInfo:
@@ -45,6 +205,115 @@ class VideoInfo:
     tokens_estimate: int = 0
     summary_status: str = "PENDING"
     error: str = ""
+    transcript_hash: str = ""
+
+
+# Conditional-GET cache of channel/playlist feeds, under the output directory
+FEED_CACHE_DIR = ".http_cache"
+
+# Seconds without a streamed token before an AI call counts as stalled
+AI_STREAM_IDLE_TIMEOUT = 30
+
+# JSON schema of the final summary answer, enforced through Anthropic tool use
+# and OpenAI structured outputs (strict mode: every key required, no extras)
+SUMMARY_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "highlights": {"type": "array", "items": {"type": "string"}},
+        "new_insights": {"type": "array", "items": {"type": "string"}},
+        "notable_quotes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"t": {"type": "string"}, "text": {"type": "string"}},
+                "required": ["t", "text"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["summary", "highlights", "new_insights", "notable_quotes"],
+    "additionalProperties": False,
+}
+
+# Answer to a batched map-phase prompt (--map-batch): one bullet list per chunk
+CHUNK_BATCH_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"sections": {"type": "array", "items": {"type": "string"}}},
+    "required": ["sections"],
+    "additionalProperties": False,
+}
+
+# Fixed column order of index.csv
+INDEX_FIELDS = ['video_id', 'title', 'url', 'published_at', 'lang',
+                'transcript_chars', 'tokens_estimate', 'summary_status', 'error',
+                'transcript_hash']
+_INDEX_HEADER = ','.join(INDEX_FIELDS) + '\r\n'
+_CSV_SPECIAL = re.compile(r'[,"\r\n]')
+
+
+def _q(value: str) -> str:
+    """CSV-quote a field only when it needs it (same output as csv.QUOTE_MINIMAL)"""
+    if _CSV_SPECIAL.search(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _index_row(v: VideoInfo) -> str:
+    """Format one index.csv record"""
+    return (f"{_q(v.video_id)},{_q(v.title)},{_q(v.url)},{_q(v.published_at)},"
+            f"{_q(v.language)},{v.transcript_chars},{v.tokens_estimate},"
+            f"{_q(v.summary_status)},{_q(v.error)},{v.transcript_hash}\r\n")
+
+
+class TransientAIError(Exception):
+    """A rate-limited or transient AI call failure that is worth retrying"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _transient_ai_error(e: Exception, sdk: Any) -> Optional[TransientAIError]:
+    """Wrap a connection error, 429 or 5xx from the anthropic/openai SDK module sdk
+
+    Anything else (bad request, prompt too long, auth) is not retried.
+    """
+    if isinstance(e, sdk.APIConnectionError):
+        return TransientAIError(str(e))
+    if isinstance(e, sdk.APIStatusError) and (e.status_code == 429 or e.status_code >= 500):
+        try:
+            retry_after: Optional[float] = float(e.response.headers.get('retry-after', ''))
+        except ValueError:
+            retry_after = None  # missing, or an HTTP date
+        return TransientAIError(str(e), retry_after)
+    return None
+
+
+_ai_backoff = wait_random_exponential(multiplier=1, max=60)
+
+
+def _ai_retry_wait(retry_state) -> float:
+    """Honour the provider's Retry-After; otherwise jittered exponential backoff"""
+    retry_after = getattr(retry_state.outcome.exception(), 'retry_after', None)
+    if retry_after is not None:
+        return min(retry_after, 60)
+    return _ai_backoff(retry_state)
+
+
+def _give_up_ai_call(retry_state) -> None:
+    """tenacity callback: every attempt of an AI call failed, report failure"""
+    retry_state.args[0].logger.error(
+        f"AI call failed {retry_state.attempt_number} times; giving up: "
+        f"{retry_state.outcome.exception()}")
+    return None
+
+
+# Retries stalled streams, rate limits and transient provider errors only;
+# callers see None once the attempts are used up
+_ai_retry = retry(stop=stop_after_attempt(5), wait=_ai_retry_wait,
+                  retry=retry_if_exception_type((TimeoutError, TransientAIError)),
+                  retry_error_callback=_give_up_ai_call)
 
 
 @dataclass
@@ -62,6 +331,57 @@ class SummaryResult:
     tokens_estimate: int
 
 
+@dataclass(frozen=True)
+class AIRoute:
+    """A provider/model pair to send AI calls to, with its SDK client"""
+    provider: str
+    model: str
+    client: Any
+
+
+class TokenBucket:
+    """Thread-safe budget of units per minute, refilled continuously
+
+    Used for the AI provider's requests-per-minute and tokens-per-minute
+    limits. penalize() halves the budget for a while after a 429.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.penalty_until = 0.0
+        self.lock = threading.Lock()
+
+    def _limit(self, now: float) -> float:
+        return self.capacity / 2 if now < self.penalty_until else self.capacity
+
+    def acquire(self, amount: float):
+        """Block until amount units are available, then take them
+
+        A request larger than the whole budget waits for a full bucket
+        instead of forever.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                limit = self._limit(now)
+                self.tokens = min(limit, self.tokens + (now - self.updated) * limit / 60)
+                self.updated = now
+                needed = min(amount, limit)
+                if self.tokens >= needed:
+                    self.tokens -= needed
+                    return
+                wait = (needed - self.tokens) * 60 / limit
+            time.sleep(wait)
+
+    def penalize(self, seconds: float = 60):
+        """Halve the budget for the next seconds"""
+        with self.lock:
+            self.penalty_until = time.monotonic() + seconds
+            self.tokens = min(self.tokens, self.capacity / 2)
+
+
 class YouTubeSummaryTool:
     """Main tool class for YouTube transcript and summary processing"""
 
@@ -70,11 +390,12 @@ class YouTubeSummaryTool:
         self.outdir = Path(args.outdir)
         self.transcript_dir = self.outdir / "transcripts"
         self.summary_dir = self.outdir / "summaries"
-        self.index_file = self.outdir / "index.csv"
+        self.index_file = Path(args.index_file) if args.index_file else self.outdir / "index.csv"
 
-        # Create directories
-        self.transcript_dir.mkdir(parents=True, exist_ok=True)
-        self.summary_dir.mkdir(parents=True, exist_ok=True)
+        # Create directories (a dry run never writes anything)
+        if not args.dry_run:
+            self.transcript_dir.mkdir(parents=True, exist_ok=True)
+            self.summary_dir.mkdir(parents=True, exist_ok=True)
 
         # Setup logging
         self._setup_logging()
@@ -82,9 +403,34 @@ class YouTubeSummaryTool:
         # Load existing index
         self.index_data: Dict[str, VideoInfo] = self._load_index()
 
-        # Rate limiting
-        self.last_request_time = 0
+        # Cross-run cache of completed summaries (consulted by process_channel.py);
+        # a dry run never records anything, so it doesn't open the database
+        self.cache = None if args.dry_run else ResultCache(self.outdir / ResultCache.FILENAME)
+        self.cache_key = ResultCache.key(args)
+
+        # Preferred transcript languages, in order
+        self.languages = tuple(lang.strip() for lang in args.languages.split(','))
+
+        # Rate limiting (shared by all worker threads), one clock per host:
+        # YouTube (feeds, transcripts, yt-dlp) and the AI provider have
+        # independent quotas, so neither waits on the other's requests
         self.request_interval = 1.0 / args.rps
+        self._next_request_time: Dict[str, float] = {}
+        self._rate_lock = threading.Lock()
+
+        # Caps concurrent AI calls (chunk summaries of all videos combined)
+        self._ai_slots = threading.BoundedSemaphore(args.ai_concurrency)
+
+        # Provider request/token budgets; when either is set, AI calls are
+        # paced by these instead of --rps
+        self._rpm_bucket = TokenBucket(args.rpm) if args.rpm else None
+        self._tpm_bucket = TokenBucket(args.tpm) if args.tpm else None
+
+        # Index updates and saves come from worker threads
+        self._index_lock = threading.Lock()
+
+        # One transcript API client (and its HTTP session) per worker thread
+        self._thread_local = threading.local()
 
         # Setup proxy and cookies if provided
         self.proxies = None
@@ -94,26 +440,104 @@ class YouTubeSummaryTool:
             self.proxies = {"https": args.proxy}
         if args.cookies_file and Path(args.cookies_file).exists():
             self.cookies_file = args.cookies_file
-            with open(args.cookies_file, 'r') as f:
-                self.cookies = f.read().strip()
+            self.cookies = Path(args.cookies_file).read_text().strip()
+
+        # Shared HTTP connection pool for feed requests (created on first use)
+        self._http_client: Optional[httpx.Client] = None
+        self._ai_http_clients: Dict[str, Any] = {}
+
+        # AI routes: the primary provider/model, then the optional fallback.
+        # Clients are built once so all calls share their connections; a
+        # missing API key fails here, before any transcript is fetched
+        self._ai_routes: List[AIRoute] = []
+        if not args.dry_run:
+            self._ai_routes.append(AIRoute(args.provider, args.model, self._make_ai_client(args.provider)))
+            if args.fallback_model:
+                provider = args.fallback_provider or args.provider
+                self._ai_routes.append(AIRoute(provider, args.fallback_model, self._make_ai_client(provider)))
+
+    @property
+    def _http(self) -> httpx.Client:
+        """Shared HTTP client, so repeated requests reuse connections"""
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                http2=True, timeout=30,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                proxy=self.proxies['https'] if self.proxies else None)
+        return self._http_client
+
+    def _ai_http(self, provider: str) -> Any:
+        """HTTP client handed to the provider's SDK
+
+        Its pool is sized to --ai-concurrency rather than the SDK defaults,
+        so every concurrent AI call keeps a warm connection. It is built from
+        the SDK's DefaultHttpxClient to keep the SDK's other client defaults.
+        """
+        if provider not in self._ai_http_clients:
+            sdk = __import__(provider)
+            self._ai_http_clients[provider] = sdk.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=self.args.ai_concurrency * 2,
+                                    max_keepalive_connections=self.args.ai_concurrency),
+                timeout=httpx.Timeout(120.0, connect=10.0))
+        return self._ai_http_clients[provider]
+
+    def _make_ai_client(self, provider: str) -> Any:
+        """Create the SDK client for provider
+
+        The SDK's own retries are off: _call_anthropic/_call_openai retry
+        through tenacity, so attempts don't multiply.
+        """
+        if provider == 'anthropic':
+            import anthropic
+
+            api_key = os.getenv('ANTHROPIC_API_KEY')
+            if not api_key:
+                raise ValueError("ANTHROPIC_API_KEY not found in environment or .env file")
+            return anthropic.Anthropic(api_key=api_key, http_client=self._ai_http(provider), max_retries=0)
+        elif provider == 'openai':
+            import openai
+
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY not found in environment or .env file")
+            return openai.OpenAI(api_key=api_key, http_client=self._ai_http(provider), max_retries=0)
+        raise ValueError(f"Unknown provider: {provider}")
+
+    def close(self):
+        """Release the HTTP connection pools and the result cache"""
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+        for client in self._ai_http_clients.values():
+            client.close()
+        self._ai_http_clients.clear()
+        if self.cache is not None:
+            self.cache.close()
 
     def _setup_logging(self):
         """Setup logging configuration"""
         log_format = '%(asctime)s - %(levelname)s - %(message)s'
-        handlers: List[logging.Handler] = [logging.StreamHandler()]
-
-        if self.args.log_file:
-            handlers.append(logging.FileHandler(self.args.log_file))
-
         logging.basicConfig(
             level=logging.INFO,
             format=log_format,
-            handlers=handlers
+            handlers=[logging.StreamHandler()]
         )
+        # basicConfig is a no-op when a caller (e.g. process_channel.py) has
+        # already configured logging, so set the level and file handler on
+        # this module's logger directly
         self.logger = logging.getLogger(__name__)
+        self.logger.setLevel(logging.INFO)
+
+        if self.args.log_file and not self.args.dry_run:
+            file_handler = logging.FileHandler(self.args.log_file)
+            file_handler.setFormatter(logging.Formatter(log_format))
+            self.logger.addHandler(file_handler)
 
     def _load_index(self) -> Dict[str, VideoInfo]:
-        """Load existing index from CSV"""
+        """Load existing index from CSV
+
+        Rows appended by an interrupted run may repeat a video; the last row wins.
+        """
         index: Dict[str, VideoInfo] = {}
         if self.index_file.exists():
             with open(self.index_file, 'r', encoding='utf-8') as f:
@@ -128,51 +552,126 @@ class YouTubeSummaryTool:
                         transcript_chars=int(row.get('transcript_chars', 0)),
                         tokens_estimate=int(row.get('tokens_estimate', 0)),
                         summary_status=row.get('summary_status', 'PENDING'),
-                        error=row.get('error', '')
+                        error=row.get('error', ''),
+                        transcript_hash=row.get('transcript_hash') or ''
                     )
                     index[row['video_id']] = video_info
         return index
 
+    def _append_index_row(self, video_info: VideoInfo):
+        """Append one video's current row to the index CSV
+
+        Called after every video instead of rewriting the whole file. A video
+        may appear more than once; _load_index keeps the last row and
+        _save_index compacts the file at the end of a run.
+        """
+        with open(self.index_file, 'a', encoding='utf-8', newline='') as f:
+            if f.tell() == 0:
+                f.write(_INDEX_HEADER)
+            f.write(_index_row(video_info))
+
     def _save_index(self):
-        """Save index to CSV"""
-        with open(self.index_file, 'w', encoding='utf-8', newline='') as f:
-            fieldnames = ['video_id', 'title', 'url', 'published_at', 'lang',
-                         'transcript_chars', 'tokens_estimate', 'summary_status', 'error']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for video_info in self.index_data.values():
-                writer.writerow({
-                    'video_id': video_info.video_id,
-                    'title': video_info.title,
-                    'url': video_info.url,
-                    'published_at': video_info.published_at,
-                    'lang': video_info.language,
-                    'transcript_chars': video_info.transcript_chars,
-                    'tokens_estimate': video_info.tokens_estimate,
-                    'summary_status': video_info.summary_status,
-                    'error': video_info.error
-                })
-
-    def _rate_limit(self):
-        """Apply rate limiting"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.request_interval:
-            time.sleep(self.request_interval - elapsed)
-        self.last_request_time = time.time()
+        """Save index to CSV
+
+        The schema is fixed, so rows are formatted directly and written in a
+        single buffered write instead of going through csv.DictWriter. The
+        rows go to a temporary file that then replaces the index, so an
+        interrupted compaction never leaves a truncated index behind.
+        """
+        tmp_path = self.index_file.with_name(self.index_file.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8', newline='',
+                  buffering=1024 * 1024) as f:
+            f.write(_INDEX_HEADER)
+            f.writelines(map(_index_row, self.index_data.values()))
+        os.replace(tmp_path, self.index_file)
+
+    def _rate_limit(self, host: str = 'youtube'):
+        """Apply rate limiting for requests to host
+
+        Each caller reserves the next free request slot for the host under a
+        lock and then sleeps until that slot outside the lock, so concurrent
+        workers are spaced request_interval apart without serializing on the
+        sleep itself.
+        """
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_request_time.get(host, 0.0))
+            self._next_request_time[host] = slot + self.request_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _back_off(self, host: str, seconds: float):
+        """Hold every request to host for the next seconds (after a 429)"""
+        with self._rate_lock:
+            resume = time.monotonic() + seconds
+            self._next_request_time[host] = max(self._next_request_time.get(host, 0.0), resume)
+
+    def _transcript_api(self) -> YouTubeTranscriptApi:
+        """Return this thread's transcript API client"""
+        api = getattr(self._thread_local, 'transcript_api', None)
+        if api is None:
+            api = self._thread_local.transcript_api = YouTubeTranscriptApi()
+        return api
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def _fetch_feed(self, url: str) -> str:
-        """Fetch Atom feed with retry"""
+    def _fetch_feed(self, url: str) -> bytes:
+        """Fetch Atom feed with retry
+
+        Returns the raw bytes so the XML parser handles the declared encoding.
+        A copy of each feed is kept in outdir/.http_cache: it is reused as-is
+        while its Cache-Control max-age is fresh, and otherwise revalidated with
+        If-None-Match / If-Modified-Since so an unchanged feed costs a 304.
+        """
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        body_path = self.outdir / FEED_CACHE_DIR / f"{key}.xml"
+        meta_path = body_path.with_suffix('.json')
+        meta: Dict[str, Any] = _read_json(meta_path) if meta_path.exists() and body_path.exists() else {}
+
+        if meta.get('expires', 0) > time.time():
+            return body_path.read_bytes()
+
+        headers: Dict[str, str] = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
         self._rate_limit()
-        response = httpx.get(url, timeout=30)
-        response.raise_for_status()
-        return response.text
+        response = self._http.get(url, headers=headers)
+        if response.status_code == 429:
+            # Slow every YouTube request down, not just this retry
+            try:
+                retry_after = float(response.headers.get('retry-after', ''))
+            except ValueError:
+                retry_after = 30.0
+            self.logger.warning(f"Rate limited by YouTube; pausing requests for {retry_after:.0f}s")
+            self._back_off('youtube', retry_after)
+        if response.status_code == 304:
+            self.logger.info(f"Feed not modified, using cached copy: {url}")
+            content = body_path.read_bytes()
+        else:
+            response.raise_for_status()
+            content = response.content
+
+        # A dry run never writes anything
+        if not self.args.dry_run:
+            max_age = _MAX_AGE_RE.search(response.headers.get('cache-control', ''))
+            meta = {
+                'etag': response.headers.get('etag', meta.get('etag')),
+                'last_modified': response.headers.get('last-modified', meta.get('last_modified')),
+                'expires': time.time() + int(max_age.group(1)) if max_age else 0,
+            }
+            body_path.parent.mkdir(exist_ok=True)
+            if response.status_code != 304:
+                body_path.write_bytes(content)
+            _write_json(meta_path, meta)
+
+        return content
 
     def _parse_video_id(self, input_str: str) -> str:
         """Extract video ID from various input formats"""
         # Already a video ID
-        if re.match(r'^[a-zA-Z0-9_-]{11}$', input_str):
+        if _VIDEO_ID_RE.match(input_str):
             return input_str
 
         # YouTube URL
@@ -187,11 +686,17 @@ class YouTubeSummaryTool:
 
         return input_str
 
-    def get_video_ids(self) -> List[Tuple[str, Dict[str, str]]]:
-        """Get list of video IDs based on input arguments"""
+    def get_video_ids(self) -> Iterable[Tuple[str, Dict[str, str]]]:
+        """Get video IDs based on input arguments
+
+        Returns a list, except for --video-ids-stdin where videos are yielded
+        lazily as lines arrive.
+        """
         videos: List[Tuple[str, Dict[str, str]]] = []
 
-        if self.args.channel_id:
+        if self.args.video_ids_stdin:
+            return itertools.islice(self._get_videos_from_stdin(), self.args.max_videos or None)
+        elif self.args.channel_id:
             videos = self._get_channel_videos(self.args.channel_id)
         elif self.args.playlist_id:
             videos = self._get_playlist_videos(self.args.playlist_id)
@@ -218,31 +723,34 @@ class YouTubeSummaryTool:
         feed_content = self._fetch_feed(url)
         return self._parse_feed(feed_content)
 
-    def _parse_feed(self, feed_content: str) -> List[Tuple[str, Dict[str, str]]]:
-        """Parse Atom feed and extract video information"""
-        root = ET.fromstring(feed_content)
-        ns = {'atom': 'http://www.w3.org/2005/Atom',
-              'media': 'http://search.yahoo.com/mrss/'}
-
-        videos: List[Tuple[str, Dict[str, str]]] = []
-        for entry in root.findall('atom:entry', ns):
-            video_id_elem = entry.find('atom:id', ns)
-            if video_id_elem is not None and video_id_elem.text is not None:
-                video_id = video_id_elem.text.split(':')[-1]
-
-                title_elem = entry.find('atom:title', ns)
-                title = title_elem.text if title_elem is not None and title_elem.text is not None else ""
+    # Atom feed tags in Clark notation, for lxml iterparse
+    _ATOM = '{http://www.w3.org/2005/Atom}'
+    _ENTRY_TAG = _ATOM + 'entry'
 
-                published_elem = entry.find('atom:published', ns)
-                published = published_elem.text if published_elem is not None and published_elem.text is not None else ""
+    def _parse_feed(self, feed_content: bytes) -> List[Tuple[str, Dict[str, str]]]:
+        """Parse Atom feed and extract video information
 
+        Entries are parsed incrementally and released once read, so memory
+        stays flat even for large archive feeds.
+        """
+        videos: List[Tuple[str, Dict[str, str]]] = []
+        context = etree.iterparse(BytesIO(feed_content), events=('end',), tag=self._ENTRY_TAG)
+        for _, entry in context:
+            video_id = entry.findtext(self._ATOM + 'id')
+            if video_id:
+                video_id = video_id.split(':')[-1]
                 metadata: Dict[str, str] = {
-                    'title': title,
-                    'published_at': published,
+                    'title': entry.findtext(self._ATOM + 'title') or "",
+                    'published_at': entry.findtext(self._ATOM + 'published') or "",
                     'url': f"https://www.youtube.com/watch?v={video_id}"
                 }
                 videos.append((video_id, metadata))
 
+            # Drop the processed entry and any siblings already consumed
+            entry.clear()
+            while entry.getprevious() is not None:
+                del entry.getparent()[0]
+
         return videos
 
     def _get_videos_from_file(self, file_path: str) -> List[Tuple[str, Dict[str, str]]]:
@@ -285,6 +793,24 @@ class YouTubeSummaryTool:
                         videos.append((video_id, metadata))
         return videos
 
+    def _get_videos_from_stdin(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """Yield videos from stdin as they arrive
+
+        Each line is a video ID/URL, optionally followed by tab-separated title
+        and published date (the format of channel_index.py --stream-ids).
+        """
+        for line in sys.stdin:
+            fields = line.rstrip('\n').split('\t')
+            if not fields[0].strip():
+                continue
+            video_id = self._parse_video_id(fields[0].strip())
+            metadata = {
+                'title': fields[1] if len(fields) > 1 else '',
+                'published_at': fields[2] if len(fields) > 2 else '',
+                'url': f"https://www.youtube.com/watch?v={video_id}"
+            }
+            yield video_id, metadata
+
     def fetch_transcript(self, video_id: str) -> Optional[Tuple[List[Dict[str, Any]], str, str]]:
         """Fetch transcript for a video"""
         try:
@@ -294,10 +820,8 @@ class YouTubeSummaryTool:
 
             if json_path.exists() and txt_path.exists() and not self.args.force:
                 self.logger.info(f"Transcript already exists for {video_id}, skipping")
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    segments = json.load(f)
-                with open(txt_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
+                segments = _read_json(json_path)
+                text = _read_text(txt_path)
                 # Detect language from existing data
                 lang = self.index_data.get(video_id, VideoInfo(video_id=video_id)).language or 'unknown'
                 return segments, text, lang
@@ -316,32 +840,23 @@ class YouTubeSummaryTool:
                 kwargs['proxies'] = self.proxies
             # Note: youtube-transcript-api doesn't support cookies directly
 
-            api = YouTubeTranscriptApi()
-            transcript_list = api.list(video_id, **kwargs)
+            transcript_list = self._transcript_api().list(video_id, **kwargs)
 
-            # Try to get transcript in preferred languages
-            languages = [lang.strip() for lang in self.args.languages.split(',')]
+            # Try to get transcript in preferred languages: manually created
+            # transcripts first, then generated ones. The list is indexed once
+            # instead of probing it per language.
+            languages = self.languages
             transcript = None
             selected_lang = None
 
-            # First try manually created transcripts
-            for lang in languages:
-                try:
-                    transcript = transcript_list.find_manually_created_transcript([lang])
-                    selected_lang = lang
+            available: Tuple[Dict[str, Any], Dict[str, Any]] = ({}, {})
+            for t in transcript_list:
+                available[bool(t.is_generated)].setdefault(t.language_code, t)
+            for by_lang in available:
+                selected_lang = next((lang for lang in languages if lang in by_lang), None)
+                if selected_lang:
+                    transcript = by_lang[selected_lang]
                     break
-                except:
-                    continue
-
-            # Then try generated transcripts
-            if not transcript:
-                for lang in languages:
-                    try:
-                        transcript = transcript_list.find_generated_transcript([lang])
-                        selected_lang = lang
-                        break
-                    except:
-                        continue
 
             # Try to get translated version
             if not transcript:
@@ -364,44 +879,27 @@ class YouTubeSummaryTool:
 
             segments = transcript.fetch(preserve_formatting=False, **fetch_kwargs)  # type: ignore[arg-type]
 
-            # Process segments
-            processed_segments: List[Dict[str, Any]] = []
-            text_parts: List[str] = []
+            # Process segments. Depending on the youtube-transcript-api version
+            # they are dicts or FetchedTranscriptSnippet objects; the type is the
+            # same for the whole transcript, so pick the accessor once.
+            fields = ('text', 'start', 'duration')
+            unpack = itemgetter(*fields) if isinstance(next(iter(segments), None), dict) else attrgetter(*fields)
 
-            for segment in segments:
+            processed_segments: List[Dict[str, Any]] = []
+            for text, start, duration in map(unpack, segments):
+                text = str(text)
                 # Clean text if requested
-                # Handle both dict and object formats
-                if isinstance(segment, dict):
-                    # Cast segment to Any to avoid type checking issues with get()
-                    seg: Any = segment
-                    text = str(seg.get('text', ''))
-                    start = float(seg.get('start', 0))
-                    duration = float(seg.get('duration', 0))
-                else:
-                    # FetchedTranscriptSnippet object
-                    text = str(segment.text)  # type: ignore[attr-defined]
-                    start = float(segment.start)  # type: ignore[attr-defined]
-                    duration = float(segment.duration)  # type: ignore[attr-defined]
-
                 if self.args.clean_tags:
-                    text = re.sub(r'\[.*?\]', '', text).strip()
+                    text = _strip_tags(text)
 
                 processed_segment: Dict[str, Any] = {
-                    'start': start,
-                    'duration': duration,
+                    'start': float(start),
+                    'duration': float(duration),
                     'text': text
                 }
                 processed_segments.append(processed_segment)
-                text_parts.append(text)
-
-            full_text = ' '.join(text_parts)
 
-            # Save to files
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(processed_segments, f, ensure_ascii=False, indent=2)
-
-            with open(txt_path, 'w', encoding='utf-8') as f:
-                f.write(full_text)
+            full_text = self._save_transcript(video_id, processed_segments)
 
             self.logger.info(f"Fetched transcript for {video_id} in {selected_lang}")
             return processed_segments, full_text, selected_lang or 'unknown'
@@ -428,204 +926,141 @@ class YouTubeSummaryTool:
             self.logger.error(f"Failed to fetch transcript for {video_id}: {e}")
             return None
 
+    def _save_transcript(self, video_id: str, segments: List[Dict[str, Any]]) -> str:
+        """Write the segment JSON and plain-text transcript; return the text
+
+        The text is joined straight from the segments and encoded once, so
+        the only full-length copies are the returned str and the bytes
+        written to disk, which are released on return.
+        """
+        full_text = ' '.join(map(itemgetter('text'), segments))
+        _write_json(self.transcript_dir / f"{video_id}.json", segments, indent=self.args.pretty_json)
+        _write_bytes(self.transcript_dir / f"{video_id}.txt", full_text.encode('utf-8'))
+        return full_text
+
+    def _ytdlp(self):
+        """Return this thread's YoutubeDL instance (created on first use)
+
+        yt_dlp is imported here because it is only needed for the fallback path.
+        The instance is reused across videos, along with its cookies and
+        connections.
+        """
+        ydl = getattr(self._thread_local, 'ytdlp', None)
+        if ydl is None:
+            from yt_dlp import YoutubeDL
+
+            opts: Dict[str, Any] = {
+                'quiet': True,
+                'no_warnings': True,
+                'http_headers': {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'},
+                'nocheckcertificate': True,
+                'socket_timeout': 30,
+                'extractor_args': {'youtube': {'player_client': ['android']}},  # Use Android client which is less restricted
+            }
+            if self.proxies and self.proxies.get('https'):
+                opts['proxy'] = self.proxies['https']
+            if self.cookies_file:
+                opts['cookiefile'] = self.cookies_file
+            ydl = self._thread_local.ytdlp = YoutubeDL(opts)
+        return ydl
+
     def _fetch_transcript_ytdlp(self, video_id: str) -> Optional[Tuple[List[Dict[str, Any]], str, str]]:
         """Fetch transcript using yt-dlp as alternative method"""
         try:
             self.logger.info(f"Fetching transcript for {video_id} using yt-dlp")
 
-            # Prepare yt-dlp command
             url = f"https://www.youtube.com/watch?v={video_id}"
+            ydl = self._ytdlp()
 
-            # Get available subtitles info first
-            info_cmd = [
-                'yt-dlp',
-                '--list-subs',
-                '--no-warnings',
-                '--user-agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                '--no-check-certificate',
-                url
-            ]
-
-            if self.proxies and self.proxies.get('https'):
-                info_cmd.extend(['--proxy', self.proxies['https']])
-            if self.cookies_file:
-                info_cmd.extend(['--cookies', self.cookies_file])
-
-            # Check available subtitles
-            result = subprocess.run(info_cmd, capture_output=True, text=True, timeout=30)
+            # Extract video info once; it lists the available subtitles and
+            # their URLs
+            self._rate_limit()
+            info = ydl.extract_info(url, download=False, process=False)
+            available = {**(info.get('automatic_captions') or {}), **(info.get('subtitles') or {})}
 
             # Determine language to download
-            languages = [lang.strip() for lang in self.args.languages.split(',')]
-            selected_lang = None
-
-            for lang in languages:
-                if lang in result.stdout:
-                    selected_lang = lang
-                    break
+            selected_lang = next((lang for lang in self.languages if lang in available), None)
 
             if not selected_lang:
                 # Try auto-generated
-                if 'ja' in result.stdout or 'Japanese' in result.stdout:
+                if 'ja' in available:
                     selected_lang = 'ja'
-                elif 'en' in result.stdout or 'English' in result.stdout:
+                elif 'en' in available:
                     selected_lang = 'en'
                 else:
                     self.logger.warning(f"No suitable subtitles found for {video_id}")
                     return None
 
-            # Download subtitles
-            with tempfile.TemporaryDirectory() as tmpdir:
-                output_path = Path(tmpdir) / '%(id)s.%(ext)s'
-
-                cmd: List[str] = [
-                    'yt-dlp',
-                    '--write-sub',
-                    '--write-auto-sub',
-                    '--sub-lang', selected_lang,
-                    '--skip-download',
-                    '--sub-format', 'vtt/ttml/srv1/srv2/srv3/json3/best',  # Try vtt first as it's more stable
-                    '--no-warnings',
-                    '--user-agent', 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    '--no-check-certificate',
-                    '--sleep-interval', '2',  # Sleep 2 seconds between requests
-                    '--max-sleep-interval', '5',
-                    '--extractor-args', 'youtube:player_client=android',  # Use Android client which is less restricted
-                    '-o', str(output_path),
-                    url
-                ]
-
-                if self.proxies and self.proxies.get('https'):
-                    cmd.extend(['--proxy', str(self.proxies['https'])])
-                if self.cookies_file:
-                    cmd.extend(['--cookies', str(self.cookies_file)])
-
-                # Execute yt-dlp
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-                if result.returncode != 0:
-                    self.logger.error(f"yt-dlp failed: {result.stderr}")
-                    return None
+            # Pick a format we can parse (VTT first, as it's more stable)
+            track = next((t for ext in ('vtt', 'json3') for t in available[selected_lang]
+                          if t.get('ext') == ext and t.get('url')), None)
+            if track is None:
+                self.logger.error(f"No VTT or json3 subtitle track for {video_id}")
+                return None
 
-                # Find the downloaded subtitle file
-                subtitle_files = list(Path(tmpdir).glob(f"{video_id}*"))
-                subtitle_files = [f for f in subtitle_files if f.suffix in ['.json3', '.srv3', '.srv2', '.srv1', '.vtt', '.ttml', '.srt']]
-                if not subtitle_files:
-                    self.logger.error(f"No subtitle file found for {video_id}")
-                    return None
+            # Download the subtitle into memory; only the final transcript
+            # files are written to disk
+            self._rate_limit()
+            with ydl.urlopen(track['url']) as response:
+                subtitle_bytes = response.read()
+            self.logger.info(f"Downloaded {track['ext']} subtitles for {video_id}")
 
-                # Parse subtitle file
-                subtitle_file = subtitle_files[0]
-                file_ext = subtitle_file.suffix.lower()
-                self.logger.info(f"Found subtitle file: {subtitle_file.name}")
-
-                segments: List[Dict[str, Any]] = []
-                text_parts: List[str] = []
-
-                if file_ext in ['.json3', '.srv3', '.srv2', '.srv1']:
-                    # Parse JSON-based subtitle format
-                    with open(subtitle_file, 'r', encoding='utf-8') as f:
-                        subtitle_data = json.load(f)
-
-                    for event in subtitle_data.get('events', []):
-                        if 'segs' in event:
-                            text = ''.join(seg.get('utf8', '') for seg in event['segs'])
-                            if text.strip():
-                                # Clean text if requested
-                                if self.args.clean_tags:
-                                    text = re.sub(r'\[.*?\]', '', text).strip()
-
-                                subtitle_segment: Dict[str, Any] = {
-                                    'start': event.get('tStartMs', 0) / 1000.0,
-                                    'duration': event.get('dDurationMs', 0) / 1000.0,
-                                    'text': text
-                                }
-                                segments.append(subtitle_segment)
-                                text_parts.append(str(text))
-
-                elif file_ext == '.vtt':
-                    # Parse VTT format
-                    with open(subtitle_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-
-                    # Remove WEBVTT header and metadata
-                    lines = content.split('\n')
-
-                    i = 0
-                    while i < len(lines):
-                        # Skip header and empty lines
-                        if lines[i].startswith('WEBVTT') or lines[i].strip() == '' or lines[i].startswith('NOTE'):
-                            i += 1
-                            continue
-
-                        # Look for timestamp line
-                        if ' --> ' in lines[i]:
-                            timestamp_line = lines[i].strip()
-
-                            # Parse timestamp
-                            match = re.match(r'(\d{2}:\d{2}:\d{2}[.,]\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2}[.,]\d{3})', timestamp_line)
-                            if not match:
-                                i += 1
-                                continue
-
-                            start_time = match.group(1).replace(',', '.')
-                            end_time = match.group(2).replace(',', '.')
-
-                            # Convert time to seconds
-                            def time_to_seconds(time_str: str) -> float:
-                                parts = time_str.split(':')
-                                return float(parts[0]) * 3600 + float(parts[1]) * 60 + float(parts[2])
-
-                            start = time_to_seconds(start_time)
-                            end = time_to_seconds(end_time)
-
-                            # Collect text lines until next timestamp or empty line
-                            text_lines: List[str] = []
-                            i += 1
-                            while i < len(lines) and lines[i].strip() != '' and ' --> ' not in lines[i]:
-                                text_lines.append(lines[i].strip())
-                                i += 1
-
-                            # Join and clean text
-                            text = ' '.join(text_lines)
-                            text = re.sub(r'<[^>]+>', '', text)  # Remove HTML tags
-                            text = re.sub(r'\{[^}]+\}', '', text)  # Remove style tags
-                            if self.args.clean_tags:
-                                text = re.sub(r'\[.*?\]', '', text).strip()
-
-                            text = text.strip()
-                            if text:
-                                vtt_segment: Dict[str, Any] = {
-                                    'start': start,
-                                    'duration': end - start,
-                                    'text': text
-                                }
-                                segments.append(vtt_segment)
-                                text_parts.append(str(text))
-                        else:
-                            i += 1
+            segments: List[Dict[str, Any]] = []
 
-                if not segments:
-                    self.logger.error(f"No valid segments found in subtitle for {video_id}")
-                    return None
+            if track['ext'] == 'json3':
+                # Parse JSON-based subtitle format
+                subtitle_data = orjson.loads(subtitle_bytes)
 
-                full_text: str = ' '.join(text_parts)
+                for event in subtitle_data.get('events', []):
+                    if 'segs' in event:
+                        text = ''.join(seg.get('utf8', '') for seg in event['segs'])
+                        if text.strip():
+                            # Clean text if requested
+                            if self.args.clean_tags:
+                                text = _strip_tags(text)
 
-                # Save to files
-                json_path = self.transcript_dir / f"{video_id}.json"
-                txt_path = self.transcript_dir / f"{video_id}.txt"
+                            subtitle_segment: Dict[str, Any] = {
+                                'start': event.get('tStartMs', 0) / 1000.0,
+                                'duration': event.get('dDurationMs', 0) / 1000.0,
+                                'text': text
+                            }
+                            segments.append(subtitle_segment)
 
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(segments, f, ensure_ascii=False, indent=2)
+            else:
+                # Parse VTT format: one regex pass yields every cue's
+                # timestamps and text block (header, NOTE and cue
+                # identifier lines never match)
+                content = subtitle_bytes.decode('utf-8')
+
+                for match in _VTT_CUE_RE.finditer(content):
+                    start = _vtt_seconds(match.group(1))
+                    end = _vtt_seconds(match.group(2))
+
+                    # Join and clean text
+                    text = ' '.join(line.strip() for line in match.group(3).splitlines())
+                    text = _HTML_TAG_RE.sub('', text)  # Remove HTML tags
+                    text = _STYLE_TAG_RE.sub('', text)  # Remove style tags
+                    if self.args.clean_tags:
+                        text = _strip_tags(text)
+
+                    text = text.strip()
+                    if text:
+                        vtt_segment: Dict[str, Any] = {
+                            'start': start,
+                            'duration': end - start,
+                            'text': text
+                        }
+                        segments.append(vtt_segment)
 
-                with open(txt_path, 'w', encoding='utf-8') as f:
-                    f.write(full_text)
+            if not segments:
+                self.logger.error(f"No valid segments found in subtitle for {video_id}")
+                return None
 
-                self.logger.info(f"Successfully fetched transcript for {video_id} using yt-dlp (lang: {selected_lang})")
-                return segments, full_text, selected_lang
+            full_text = self._save_transcript(video_id, segments)
+
+            self.logger.info(f"Successfully fetched transcript for {video_id} using yt-dlp (lang: {selected_lang})")
+            return segments, full_text, selected_lang
 
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"yt-dlp timeout for {video_id}")
-            return None
         except Exception as e:
             self.logger.error(f"Failed to fetch transcript with yt-dlp for {video_id}: {e}")
             return None
@@ -633,35 +1068,21 @@ class YouTubeSummaryTool:
     def generate_summary(self, video_id: str, text: str, metadata: Dict[str, str]) -> Optional[SummaryResult]:  # type: ignore[return]
         """Generate AI summary for the transcript"""
         try:
-            # Check if already exists and not forcing
-            json_path = self.summary_dir / f"{video_id}.json"
-            md_path = self.summary_dir / f"{video_id}.md"
-
-            if json_path.exists() and md_path.exists() and not self.args.force:
-                self.logger.info(f"Summary already exists for {video_id}, skipping")
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return SummaryResult(**data)
+            existing = self._existing_summary(video_id)
+            if existing:
+                return existing
 
             # Estimate tokens (rough estimate for Japanese: 2-3 chars per token)
             # tokens_estimate = len(text) // 2  # Not used directly, calculated in SummaryResult
 
             # Apply map-reduce if text is too long
-            if len(text) > self.args.chunk_chars * 2:
+            if self._needs_map_reduce(text):
                 summary_data = self._map_reduce_summary(video_id, text, metadata)
             else:
                 summary_data = self._direct_summary(video_id, text, metadata)
 
             if summary_data:
-                # Save JSON
-                with open(json_path, 'w', encoding='utf-8') as f:
-                    json.dump(asdict(summary_data), f, ensure_ascii=False, indent=2)
-
-                # Save Markdown
-                md_content = self._format_markdown(summary_data)
-                with open(md_path, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
-
+                self._save_summary(summary_data)
                 self.logger.info(f"Generated summary for {video_id}")
                 return summary_data
 
@@ -669,47 +1090,126 @@ class YouTubeSummaryTool:
             self.logger.error(f"Failed to generate summary for {video_id}: {e}")
             return None
 
-    def _chunk_text(self, text: str) -> List[str]:
-        """Split text into chunks with overlap"""
-        chunks: List[str] = []
+    def _existing_summary(self, video_id: str, unchanged: bool = False) -> Optional[SummaryResult]:
+        """Return the saved summary for video_id, unless missing or --force
+
+        unchanged means the transcript and the summary settings are the same as
+        when the saved summary was made, so it is reused even with --force.
+        """
+        json_path = self.summary_dir / f"{video_id}.json"
+        md_path = self.summary_dir / f"{video_id}.md"
+        if json_path.exists() and md_path.exists() and (unchanged or not self.args.force):
+            reason = "transcript unchanged" if self.args.force else "already exists"
+            self.logger.info(f"Summary {reason} for {video_id}, skipping")
+            return SummaryResult(**_read_json(json_path))
+        return None
+
+    def _transcript_unchanged(self, video_info: VideoInfo, text: str) -> bool:
+        """Update video_info's transcript hash; whether its summary is still current
+
+        True when the hash matches the one recorded with the last completed
+        summary and the result cache has that summary under the current
+        settings. --no-ai-cache always regenerates.
+        """
+        transcript_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+        # The lock also serializes use of the cache connection across workers
+        with self._index_lock:
+            previous, video_info.transcript_hash = video_info.transcript_hash, transcript_hash
+            return (previous == transcript_hash
+                    and video_info.summary_status == 'COMPLETED'
+                    and self.cache is not None and not self.args.no_ai_cache
+                    and self.cache.summary_path(video_info.video_id, self.cache_key) is not None)
+
+    def _save_summary(self, summary: SummaryResult):
+        """Save a summary as JSON and Markdown"""
+        _write_json(self.summary_dir / f"{summary.video_id}.json", summary)
+        md_content = self._format_markdown(summary)
+        _write_bytes(self.summary_dir / f"{summary.video_id}.md", md_content.encode('utf-8'))
+
+    def _needs_map_reduce(self, text: str) -> bool:
+        """Whether text is too long to summarize in one prompt"""
+        return len(text) > self.args.chunk_chars * 2
+
+    def _chunk_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Return (start, end) offsets of overlapping chunks of text
+
+        Only the offsets are computed here; each chunk is sliced when its
+        prompt is built, so the whole transcript is never held twice. The last
+        end offset may run past the text; slicing clamps it.
+        """
         chunk_size = self.args.chunk_chars
-        overlap = self.args.chunk_overlap
-
-        start = 0
-        while start < len(text):
-            end = min(start + chunk_size, len(text))
-            chunk = text[start:end]
-            chunks.append(chunk)
-            start += chunk_size - overlap
-
-        return chunks
+        step = chunk_size - self.args.chunk_overlap
+        return [(i, i + chunk_size) for i in range(0, len(text), step)]
 
     def _map_reduce_summary(self, video_id: str, text: str, metadata: Dict[str, str]) -> Optional[SummaryResult]:
         """Map-reduce approach for long texts"""
-        chunks = self._chunk_text(text)
+        combined_points = self._summarize_chunks(video_id, text)
+        if combined_points is None:
+            return None
+        return self._generate_final_summary(video_id, combined_points, metadata, is_reduced=True)
+
+    def _summarize_chunks(self, video_id: str, text: str) -> Optional[str]:
+        """Map phase: key points of every chunk, joined in chunk order"""
+        chunks = self._chunk_spans(text)
         self.logger.info(f"Processing {len(chunks)} chunks for {video_id}")
 
-        # Map phase: summarize each chunk
-        chunk_summaries: List[str] = []
-        for i, chunk in enumerate(chunks):
-            prompt = f"""以下のテキストは、YouTubeの動画の文字起こしの一部（{i+1}/{len(chunks)}）です。
-重要なポイントを箇条書きで3-5個抽出してください。
+        # Map phase: summarize each chunk. With --map-batch K, consecutive chunks share one call
+        k = self.args.map_batch
+        groups = [range(i, min(i + k, len(chunks))) for i in range(0, len(chunks), k)]
+
+        def summarize_group(group: range) -> List[Optional[str]]:
+            if len(group) > 1:
+                points = self._summarize_chunk_group(video_id, text, chunks, group)
+                if points is not None:
+                    return points
+            # Each prompt is built just before its call, so at most one chunk
+            # copy per in-flight call exists alongside the transcript
+            return [self._call_ai(self._chunk_prompt(text, chunks, i), max_tokens=500) for i in group]
+
+        # Groups are independent, so their calls run concurrently; map() keeps
+        # chunk order for the reduce phase
+        with ThreadPoolExecutor(max_workers=self.args.ai_concurrency) as executor:
+            chunk_summaries = [summary for points in executor.map(summarize_group, groups)
+                               for summary in points if summary]
 
-テキスト:
-{chunk}
+        if not chunk_summaries:
+            return None
 
-重要ポイント（箇条書き）:"""
+        # Input for the reduce phase
+        return "\n".join(chunk_summaries)
 
-            summary = self._call_ai(prompt, max_tokens=500)
-            if summary:
-                chunk_summaries.append(summary)
+    def _chunk_prompt(self, text: str, chunks: List[Tuple[int, int]], i: int) -> str:
+        """Map-phase prompt for chunk i"""
+        start, end = chunks[i]
+        return CHUNK_PROMPT.format(index=i + 1, total=len(chunks), text=text[start:end])
 
-        if not chunk_summaries:
+    def _summarize_chunk_group(self, video_id: str, text: str, chunks: List[Tuple[int, int]],
+                               group: range) -> Optional[List[Optional[str]]]:
+        """Key points of several consecutive chunks from one AI call (--map-batch)
+
+        Returns None when the answer is missing or does not have one list per
+        chunk, so the caller can fall back to one call per chunk.
+        """
+        prompt = self._chunk_batch_prompt(text, chunks, group)
+        response = self._call_ai(prompt, max_tokens=500 * len(group), schema=CHUNK_BATCH_SCHEMA)
+        if response is None:
             return None
+        try:
+            data = _loads_ai_json(response)
+        except ValueError:
+            data = None
+        if _schema_type_errors(data, CHUNK_BATCH_SCHEMA) or len(data.get('sections', ())) != len(group):
+            self.logger.warning(f"Batched chunk answer for {video_id} (chunks {group.start + 1}-{group.stop}) "
+                                f"is malformed, summarizing those chunks one by one")
+            return None
+        return data['sections']
 
-        # Reduce phase: combine chunk summaries
-        combined_points = "\n".join(chunk_summaries)
-        return self._generate_final_summary(video_id, combined_points, metadata, is_reduced=True)
+    def _chunk_batch_prompt(self, text: str, chunks: List[Tuple[int, int]], group: range) -> str:
+        """Map-phase prompt covering the chunks in group"""
+        sections = "\n\n".join(CHUNK_BATCH_SECTION.format(index=i + 1, text=text[chunks[i][0]:chunks[i][1]])
+                                 for i in group)
+        return CHUNK_BATCH_PROMPT.format(total=len(chunks), first=group.start + 1, last=group.stop,
+                                         sections=sections)
 
     def _direct_summary(self, video_id: str, text: str, metadata: Dict[str, str]) -> Optional[SummaryResult]:
         """Direct summary for shorter texts"""
@@ -717,130 +1217,287 @@ class YouTubeSummaryTool:
 
     def _generate_final_summary(self, video_id: str, content: str, metadata: Dict[str, str], is_reduced: bool) -> Optional[SummaryResult]:
         """Generate final structured summary"""
-        if is_reduced:
-            context = "以下は動画の各セクションから抽出された重要ポイントのリストです。"
-        else:
-            context = "以下は動画の完全な文字起こしです。"
-
-        prompt = f"""{context}
-これを元に、以下の形式で日本語の要約を作成してください。
-
-タイトル: {metadata.get('title', 'Unknown')}
-
-{content}
-
-以下のJSON形式で回答してください:
-{{
-  "summary": "1段落の要約（TL;DR）。会話の文脈や流れを踏まえた内容の本質を200文字程度で",
-  "highlights": ["重要ポイント1", "重要ポイント2", ...],  // 最大10個
-  "new_insights": ["会話から得られる新しい気づき1", ...],  // 3-5個、会話の相互作用から生まれる示唆
-  "notable_quotes": [{{"t": "MM:SS", "text": "印象的な発言"}}, ...]  // 2-3個、時間は推定で可
-}}"""
-
-        response = self._call_ai(prompt, max_tokens=2000)
+        prompt = self._final_summary_prompt(content, metadata, is_reduced)
+        response = self._call_ai(prompt, max_tokens=2000, schema=SUMMARY_SCHEMA)
         if not response:
             return None
-
+        return self._parse_summary(video_id, response, content, metadata)
+
+    def _final_summary_prompt(self, content: str, metadata: Dict[str, str], is_reduced: bool) -> str:
+        """Prompt for the final structured summary"""
+        return FINAL_SUMMARY_PROMPT.format(
+            context=REDUCED_CONTEXT if is_reduced else TRANSCRIPT_CONTEXT,
+            title=metadata.get('title', 'Unknown'), content=content)
+
+    def _packed_summary_prompt(self, items: List[Tuple[str, str, Dict[str, str]]]) -> str:
+        """Prompt summarizing several short transcripts at once (--pack-videos)
+
+        items are (video_id, transcript, metadata); the answer is one JSON
+        object keyed by video ID.
+        """
+        videos = "\n\n".join(
+            PACKED_VIDEO_SECTION.format(video_id=video_id, title=metadata.get('title', 'Unknown'), text=text)
+            for video_id, text, metadata in items)
+        return PACKED_SUMMARY_PROMPT.format(videos=videos)
+
+    def _parse_summary(self, video_id: str, response: str, content: str, metadata: Dict[str, str]) -> Optional[SummaryResult]:
+        """Build a SummaryResult from the model's JSON answer to the final prompt"""
         try:
-            # Parse JSON response
-            data = json.loads(response)
-
-            # Estimate tokens
-            total_text = metadata.get('title', '') + content
-            tokens_estimate = len(total_text) // 2
-
-            return SummaryResult(
-                video_id=video_id,
-                title=metadata.get('title', ''),
-                url=metadata.get('url', f"https://www.youtube.com/watch?v={video_id}"),
-                published_at=metadata.get('published_at', ''),
-                language=self.index_data.get(video_id, VideoInfo(video_id=video_id)).language,
-                summary=data.get('summary', ''),
-                highlights=data.get('highlights', [])[:10],
-                new_insights=data.get('new_insights', [])[:5],
-                notable_quotes=data.get('notable_quotes', [])[:3],
-                tokens_estimate=tokens_estimate
-            )
-        except json.JSONDecodeError:
+            data = _loads_ai_json(response)
+        except ValueError:
             self.logger.error(f"Failed to parse AI response as JSON for {video_id}")
             return None
+        problems = _schema_type_errors(data, SUMMARY_SCHEMA)
+        if problems:
+            self.logger.error(f"AI response for {video_id} does not match the summary format: "
+                              f"{'; '.join(problems[:5])}")
+            return None
+        return self._summary_from_data(video_id, data, content, metadata)
 
-    def _call_ai(self, prompt: str, max_tokens: int = 1000) -> Optional[str]:
-        """Call AI provider (Anthropic or OpenAI)"""
-        self._rate_limit()
-
-        if self.args.provider == 'anthropic':
-            return self._call_anthropic(prompt, max_tokens)
-        elif self.args.provider == 'openai':
-            return self._call_openai(prompt, max_tokens)
-        else:
-            raise ValueError(f"Unknown provider: {self.args.provider}")
+    def _summary_from_data(self, video_id: str, data: Dict[str, Any], content: str, metadata: Dict[str, str]) -> SummaryResult:
+        """Build a SummaryResult from a parsed summary object"""
+        title = metadata.get('title', '')
+        url = metadata.get('url')
+        if url is None:
+            url = f"https://www.youtube.com/watch?v={video_id}"
+        video_info = self.index_data.get(video_id)
+
+        # Estimate tokens
+        tokens_estimate = (len(title) + len(content)) // 2
+
+        return SummaryResult(
+            video_id=video_id,
+            title=title,
+            url=url,
+            published_at=metadata.get('published_at', ''),
+            language=video_info.language if video_info else '',
+            summary=data.get('summary', ''),
+            highlights=data.get('highlights', [])[:10],
+            new_insights=data.get('new_insights', [])[:5],
+            notable_quotes=data.get('notable_quotes', [])[:3],
+            tokens_estimate=tokens_estimate
+        )
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def _call_anthropic(self, prompt: str, max_tokens: int) -> Optional[str]:
-        """Call Anthropic Claude API"""
-        try:
-            import anthropic
+    def _call_ai(self, prompt: str, max_tokens: int = 1000,
+                 schema: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Call AI provider (Anthropic or OpenAI)
+
+        With schema, the answer is constrained to that JSON schema and
+        returned as a JSON string.
+
+        At most --ai-concurrency calls are in flight across all videos.
+        Responses are kept in the result cache, so an identical request is
+        answered from disk instead of calling the API again. When the
+        primary model fails after its retries, the --fallback-model route
+        gets the same prompt.
+        """
+        use_cache = self.cache is not None and not self.args.no_ai_cache
+        request_hashes: List[str] = []
+        if use_cache:
+            for route in self._ai_routes:
+                request_hash = ResultCache.request_hash(route.provider, route.model, max_tokens, prompt)
+                cached = self.cache.response(request_hash)
+                if cached is not None:
+                    self.logger.debug(f"AI response cache hit ({request_hash[:12]})")
+                    return cached
+                request_hashes.append(request_hash)
+
+        response, answered = None, 0
+        with self._ai_slots:
+            for i, route in enumerate(self._ai_routes):
+                if i:
+                    self.logger.warning(f"Falling back to {route.provider}/{route.model}")
+                if route.provider == 'anthropic':
+                    response = self._call_anthropic(route, prompt, max_tokens, schema)
+                elif route.provider == 'openai':
+                    response = self._call_openai(route, prompt, max_tokens, schema)
+                else:
+                    raise ValueError(f"Unknown provider: {route.provider}")
+                if response:
+                    answered = i
+                    break
 
-            api_key = os.getenv('ANTHROPIC_API_KEY')
-            if not api_key:
-                raise ValueError("ANTHROPIC_API_KEY not found in environment or .env file")
+        if use_cache and response:
+            self.cache.store_response(request_hashes[answered], response)
+        return response
 
-            client = anthropic.Anthropic(api_key=api_key)
+    def _ai_rate_limit(self, prompt: str, max_tokens: int):
+        """Wait for budget for one AI request (--rpm/--tpm, or --rps when neither is set)
 
-            response = client.messages.create(
-                model=self.args.model,
-                max_tokens=max_tokens,
-                messages=[{"role": "user", "content": prompt}]
-            )
+        Called before every request actually sent, retries and parameter
+        fallbacks included, so each attempt spends budget.
+        """
+        if self._rpm_bucket is None and self._tpm_bucket is None:
+            self._rate_limit('ai')
+            return
+        if self._rpm_bucket is not None:
+            self._rpm_bucket.acquire(1)
+        if self._tpm_bucket is not None:
+            # Same ~2 chars/token estimate as tokens_estimate, plus the output budget
+            self._tpm_bucket.acquire(len(prompt) // 2 + max_tokens)
+
+    def _on_rate_limited(self):
+        """The provider answered 429: halve the AI budgets for a minute"""
+        if self._tpm_bucket is not None:
+            self._tpm_bucket.penalize()
+        if self._rpm_bucket is not None:
+            self._rpm_bucket.penalize()
+
+    def _collect_stream(self, deltas: Iterable[Optional[str]], provider: str,
+                        close: Callable[[], Any]) -> str:
+        """Join streamed text deltas, raising TimeoutError on a stalled stream
+
+        A watchdog thread calls close (which closes the underlying response)
+        once no text has arrived for AI_STREAM_IDLE_TIMEOUT seconds, so a
+        stream that keeps sending only keep-alive pings, which never reach
+        this loop, is cut off too. The client's read timeout, set to the same
+        value, ends a read on a connection that has gone completely silent.
+        A slow stream keeps everything it has sent as long as no gap exceeds
+        the timeout.
+        """
+        last_delta = [time.monotonic()]
+        finished = threading.Event()
+        stalled = threading.Event()
+
+        def watch():
+            while True:
+                remaining = last_delta[0] + AI_STREAM_IDLE_TIMEOUT - time.monotonic()
+                if remaining <= 0:
+                    stalled.set()
+                    close()
+                    return
+                if finished.wait(remaining):
+                    return
+
+        threading.Thread(target=watch, name=f"{provider}-stream-watchdog", daemon=True).start()
 
-            # Extract text from response content
-            if hasattr(response.content[0], 'text'):
-                return response.content[0].text  # type: ignore[attr-defined]
-            return str(response.content[0])
+        chunks: List[str] = []
+        chars = 0
+        next_report = 1000
+        try:
+            for delta in deltas:
+                if not delta:
+                    continue
+                last_delta[0] = time.monotonic()
+                chunks.append(delta)
+                chars += len(delta)
+                if chars // 2 >= next_report:  # same ~2 chars/token estimate as tokens_estimate
+                    self.logger.debug(f"{provider} stream: ~{next_report} tokens received")
+                    next_report += 1000
+        except Exception:
+            # Closing the response makes the blocked read fail; report it as the stall
+            if not stalled.is_set():
+                raise
+        finally:
+            finished.set()
+        if stalled.is_set():
+            raise TimeoutError(f"{provider} stream sent no text for {AI_STREAM_IDLE_TIMEOUT}s")
+        return "".join(chunks)
+
+    @_ai_retry
+    def _call_anthropic(self, route: AIRoute, prompt: str, max_tokens: int,
+                        schema: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Call Anthropic Claude API"""
+        try:
+            import anthropic  # for its exception types
+
+            # A schema becomes a forced tool call, whose input is the JSON answer
+            tools: Dict[str, Any] = {}
+            if schema is not None:
+                tools = {
+                    'tools': [{'name': 'emit_json', 'description': 'Return the answer',
+                               'input_schema': schema}],
+                    'tool_choice': {'type': 'tool', 'name': 'emit_json'},
+                }
 
+            self._ai_rate_limit(prompt, max_tokens)
+            # Stream so a hung request surfaces as a timeout instead of blocking the worker
+            with route.client.messages.stream(
+                model=route.model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+                timeout=AI_STREAM_IDLE_TIMEOUT,
+                **tools
+            ) as stream:
+                if schema is None:
+                    return self._collect_stream(stream.text_stream, 'Anthropic', stream.close)
+                return self._collect_stream(
+                    (event.partial_json if event.type == 'input_json' else None for event in stream),
+                    'Anthropic', stream.close)
+
+        except (TimeoutError, anthropic.APITimeoutError) as e:
+            self.logger.warning(f"Anthropic API call stalled: {e}")
+            raise TimeoutError(str(e)) from e
         except Exception as e:
+            if isinstance(e, anthropic.RateLimitError):
+                self._on_rate_limited()
+            transient = _transient_ai_error(e, anthropic)
+            if transient is not None:
+                self.logger.warning(f"Anthropic API call failed, retrying: {e}")
+                raise transient from e
             self.logger.error(f"Anthropic API call failed: {e}")
             return None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def _call_openai(self, prompt: str, max_tokens: int) -> Optional[str]:
+    def _stream_openai(self, client: Any, params: Dict[str, Any], max_tokens: int) -> str:
+        """Run a streamed chat completion and return its text"""
+        self._ai_rate_limit(params['messages'][0]['content'], max_tokens)
+        chunks = client.chat.completions.create(
+            **params, stream=True, timeout=AI_STREAM_IDLE_TIMEOUT)
+        with chunks:
+            return self._collect_stream(
+                (chunk.choices[0].delta.content if chunk.choices else None for chunk in chunks),
+                'OpenAI', chunks.close)
+
+    @_ai_retry
+    def _call_openai(self, route: AIRoute, prompt: str, max_tokens: int,
+                     schema: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """Call OpenAI API"""
         try:
-            import openai
+            import openai  # for its exception types
 
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY not found in environment or .env file")
-
-            client = openai.OpenAI(api_key=api_key)
+            client = route.client
 
             # 基本パラメータ
             params = {
-                'model': self.args.model,
+                'model': route.model,
                 'messages': [{"role": "user", "content": prompt}]
             }
             
-            # JSON形式のレスポンスが必要な場合
-            if "json" in prompt.lower():
+            # JSON形式のレスポンスが必要な場合（スキーマ指定時は Structured Outputs）
+            if schema is not None:
+                params['response_format'] = {
+                    "type": "json_schema",
+                    "json_schema": {"name": "response", "schema": schema, "strict": True},
+                }
+            elif "json" in prompt.lower():
                 params['response_format'] = {"type": "json_object"}
 
             # まず max_tokens なしで試してみる（新しいモデルではデフォルト値が使われる）
             try:
-                self.logger.info(f"Trying API call without max_tokens for model {self.args.model}")
-                response = client.chat.completions.create(**params)
-                return response.choices[0].message.content
+                self.logger.info(f"Trying API call without max_tokens for model {route.model}")
+                return self._stream_openai(client, params, max_tokens)
+            except (TimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                    openai.InternalServerError):
+                raise
             except Exception as first_error:
                 error_str = str(first_error)
                 self.logger.debug(f"First attempt failed: {error_str}")
+
+                # Structured Outputs 非対応のモデルは JSON モードで再試行
+                if schema is not None and 'json_schema' in error_str:
+                    self.logger.info(f"Model {route.model} doesn't support json_schema, using json_object")
+                    params['response_format'] = {"type": "json_object"}
+                    return self._stream_openai(client, params, max_tokens)
                 
                 # max_tokens パラメータを追加して再試行
                 if 'max_tokens' not in error_str or 'required' in error_str.lower():
                     self.logger.info(f"Retrying with max_tokens parameter")
                     params['max_tokens'] = max_tokens
                     try:
-                        response = client.chat.completions.create(**params)
-                        return response.choices[0].message.content
+                        return self._stream_openai(client, params, max_tokens)
+                    except (TimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                            openai.InternalServerError):
+                        raise
                     except Exception as second_error:
                         error_str_2 = str(second_error)
                         self.logger.debug(f"Second attempt failed: {error_str_2}")
@@ -850,8 +1507,7 @@ class YouTubeSummaryTool:
                             self.logger.info(f"Retrying with max_completion_tokens parameter")
                             params.pop('max_tokens', None)
                             params['max_completion_tokens'] = max_tokens
-                            response = client.chat.completions.create(**params)
-                            return response.choices[0].message.content
+                            return self._stream_openai(client, params, max_tokens)
                         else:
                             raise second_error
                             
@@ -861,127 +1517,208 @@ class YouTubeSummaryTool:
                     if 'max_completion_tokens' in error_str:
                         self.logger.info(f"Using max_completion_tokens as suggested by API")
                         params['max_completion_tokens'] = max_tokens
-                        response = client.chat.completions.create(**params)
-                        return response.choices[0].message.content
+                        return self._stream_openai(client, params, max_tokens)
                     else:
                         # max_tokens を使わずに再試行（モデルのデフォルト値を使用）
-                        self.logger.info(f"Model {self.args.model} doesn't support max_tokens, using default")
-                        response = client.chat.completions.create(**params)
-                        return response.choices[0].message.content
+                        self.logger.info(f"Model {route.model} doesn't support max_tokens, using default")
+                        return self._stream_openai(client, params, max_tokens)
                 else:
                     raise first_error
 
+        except (TimeoutError, openai.APITimeoutError) as e:
+            self.logger.warning(f"OpenAI API call stalled: {e}")
+            raise TimeoutError(str(e)) from e
         except Exception as e:
+            if isinstance(e, openai.RateLimitError):
+                self._on_rate_limited()
+            transient = _transient_ai_error(e, openai)
+            if transient is not None:
+                self.logger.warning(f"OpenAI API call failed, retrying: {e}")
+                raise transient from e
             self.logger.error(f"OpenAI API call failed: {e}")
             return None
 
     def _format_markdown(self, summary: SummaryResult) -> str:
         """Format summary as Markdown"""
-        # Parse date if available
-        date_str = ""
-        if summary.published_at:
-            try:
-                dt = datetime.fromisoformat(summary.published_at.replace('Z', '+00:00'))
-                date_str = dt.strftime('%Y-%m-%d')
-            except:
-                date_str = summary.published_at
-
-        md = f"""# {summary.title}
-
-- 公開日: {date_str}
-- URL: {summary.url}
-- 言語: {summary.language}
-
-## TL;DR
-
-{summary.summary}
-
-## Highlights
-
-"""
-        for highlight in summary.highlights:
-            md += f"- {highlight}\n"
-
-        md += "\n## 新たな気づき\n\n"
-        for insight in summary.new_insights:
-            md += f"- {insight}\n"
+        date_str = _published_date(summary.published_at) if summary.published_at else ""
+
+        parts = [
+            f"# {summary.title}",
+            "",
+            f"- 公開日: {date_str}",
+            f"- URL: {summary.url}",
+            f"- 言語: {summary.language}",
+            "",
+            "## TL;DR",
+            "",
+            summary.summary,
+            "",
+            "## Highlights",
+            "",
+        ]
+        parts.extend(f"- {highlight}" for highlight in summary.highlights)
+
+        parts += ["", "## 新たな気づき", ""]
+        parts.extend(f"- {insight}" for insight in summary.new_insights)
 
         if summary.notable_quotes:
-            md += "\n## 印象的な引用\n\n"
-            for quote in summary.notable_quotes:
-                md += f"- [{quote.get('t', '??:??')}] {quote.get('text', '')}\n"
+            parts += ["", "## 印象的な引用", ""]
+            parts.extend(f"- [{quote.get('t', '??:??')}] {quote.get('text', '')}"
+                         for quote in summary.notable_quotes)
 
-        return md
+        return "\n".join(parts) + "\n"
 
     def run(self):
         """Main execution method"""
         if self.args.dry_run:
             self._dry_run()
             return
+        if self.args.batch:
+            BatchSummaryRunner(self).run()
+            return
+        if self.args.pack_videos > 1:
+            PackedSummaryRunner(self).run()
+            return
 
         # Get video IDs
         videos = self.get_video_ids()
-        self.logger.info(f"Processing {len(videos)} videos")
-
-        # Process each video
-        for video_id, metadata in tqdm(videos, desc="Processing videos"):
-            try:
-                # Update or create video info
-                if video_id not in self.index_data:
-                    self.index_data[video_id] = VideoInfo(
-                        video_id=video_id,
-                        title=metadata.get('title', ''),
-                        url=metadata.get('url', ''),
-                        published_at=metadata.get('published_at', '')
-                    )
-
-                video_info = self.index_data[video_id]
-
-                # Update metadata if available
-                if metadata.get('title'):
-                    video_info.title = metadata['title']
-                if metadata.get('published_at'):
-                    video_info.published_at = metadata['published_at']
-                if metadata.get('url'):
-                    video_info.url = metadata['url']
-
-                # Fetch transcript
-                transcript_result = self.fetch_transcript(video_id)
-                if not transcript_result:
-                    video_info.summary_status = 'TRANSCRIPT_UNAVAILABLE'
-                    video_info.error = 'Failed to fetch transcript'
-                    self._save_index()
-                    continue
-
-                _, text, language = transcript_result  # segments not used
-                video_info.language = language
-                video_info.transcript_chars = len(text)
-
-                # Generate summary
-                summary = self.generate_summary(video_id, text, metadata)
-                if summary:
-                    video_info.tokens_estimate = summary.tokens_estimate
-                    video_info.summary_status = 'COMPLETED'
-                    video_info.error = ''
-                else:
-                    video_info.summary_status = 'SUMMARY_FAILED'
-                    video_info.error = 'Failed to generate summary'
-
-                # Save index after each video
-                self._save_index()
-
-            except Exception as e:
-                self.logger.error(f"Error processing {video_id}: {e}")
-                video_info = self.index_data.get(video_id, VideoInfo(video_id=video_id))
-                video_info.summary_status = 'ERROR'
-                video_info.error = str(e)
+        if isinstance(videos, list):
+            self.logger.info(f"Processing {len(videos)} videos")
+        else:
+            self.logger.info("Processing videos from stdin as they arrive")
+
+        # Two-stage pipeline: --concurrency workers fetch transcripts (YouTube)
+        # and hand them to --ai-concurrency workers that summarize them (AI
+        # provider), so fetching continues while summaries are in progress.
+        # The per-request rate limit still applies across all workers.
+        # Submission is bounded so a long (or streamed) input isn't queued all
+        # at once, and so is the number of fetched transcripts awaiting a summary.
+        max_pending = self.args.concurrency * 2
+        backlog = threading.BoundedSemaphore(max_pending)
+        try:
+            # The progress bar is entered first so it is closed last, after
+            # both pools have drained
+            with tqdm(total=len(videos) if isinstance(videos, list) else None,
+                      desc="Processing videos") as progress, \
+                    ThreadPoolExecutor(max_workers=self.args.ai_concurrency) as summarizer, \
+                    ThreadPoolExecutor(max_workers=self.args.concurrency) as fetcher:
+
+                def summarize(video_info: VideoInfo, text: str, metadata: Dict[str, str]):
+                    try:
+                        self._summarize_pending(video_info, text, metadata)
+                    finally:
+                        backlog.release()
+                        progress.update(1)
+
+                def fetch(video_id: str, metadata: Dict[str, str]):
+                    item = self._pending_transcript(video_id, metadata)
+                    if item is None:
+                        progress.update(1)
+                        return
+                    backlog.acquire()
+                    summarizer.submit(summarize, *item, metadata)
+
+                pending = set()
+                for video_id, metadata in videos:
+                    if len(pending) >= max_pending:
+                        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    pending.add(fetcher.submit(fetch, video_id, metadata))
+                # Leaving the with block waits for the fetchers, then the summarizers
+        finally:
+            # Compact the appended rows down to one row per video
+            with self._index_lock:
                 self._save_index()
 
         self.logger.info("Processing completed")
 
+    def _summarize_pending(self, video_info: VideoInfo, text: str, metadata: Dict[str, str]):
+        """Summary stage: summarize a fetched transcript and update the index"""
+        video_id = video_info.video_id
+        try:
+            summary = self.generate_summary(video_id, text, metadata)
+            if summary:
+                self._record_summary(video_info, summary)
+            else:
+                self._record_failure(video_info, 'SUMMARY_FAILED', 'Failed to generate summary')
+        except Exception as e:
+            self.logger.error(f"Error processing {video_id}: {e}")
+            self._record_failure(video_info, 'ERROR', str(e))
+
+    def _index_entry(self, video_id: str, metadata: Dict[str, str]) -> VideoInfo:
+        """Get or create the index entry for a video, refreshed from metadata"""
+        with self._index_lock:
+            # Update or create video info
+            if video_id not in self.index_data:
+                self.index_data[video_id] = VideoInfo(
+                    video_id=video_id,
+                    title=metadata.get('title', ''),
+                    url=metadata.get('url', ''),
+                    published_at=metadata.get('published_at', '')
+                )
+
+            video_info = self.index_data[video_id]
+
+            # Update metadata if available
+            if metadata.get('title'):
+                video_info.title = metadata['title']
+            if metadata.get('published_at'):
+                video_info.published_at = metadata['published_at']
+            if metadata.get('url'):
+                video_info.url = metadata['url']
+            return video_info
+
+    def _record_summary(self, video_info: VideoInfo, summary: SummaryResult):
+        """Mark a video completed in the index and the result cache"""
+        video_id = video_info.video_id
+        with self._index_lock:
+            video_info.tokens_estimate = summary.tokens_estimate
+            video_info.summary_status = 'COMPLETED'
+            video_info.error = ''
+            if self.cache is not None:
+                self.cache.record(video_id, self.cache_key, video_info.language,
+                                  self.transcript_dir / f"{video_id}.txt",
+                                  self.summary_dir / f"{video_id}.json")
+            # Record this video's row; the index is compacted after the run
+            self._append_index_row(video_info)
+
+    def _record_failure(self, video_info: VideoInfo, status: str, error: str):
+        """Mark a video failed in the index"""
+        with self._index_lock:
+            video_info.summary_status = status
+            video_info.error = error
+            self._append_index_row(video_info)
+
+    def _pending_transcript(self, video_id: str, metadata: Dict[str, str]) -> Optional[Tuple[VideoInfo, str]]:
+        """Fetch the transcript of a video that still needs a summary
+
+        The fetch stage of run(), also used by the runners that summarize
+        videos in groups. Returns None (after recording the outcome) when the
+        transcript is unavailable or a summary already exists.
+        """
+        video_info = self._index_entry(video_id, metadata)
+        try:
+            transcript_result = self.fetch_transcript(video_id)
+            if not transcript_result:
+                self._record_failure(video_info, 'TRANSCRIPT_UNAVAILABLE', 'Failed to fetch transcript')
+                return None
+
+            _, text, language = transcript_result
+            video_info.language = language
+            video_info.transcript_chars = len(text)
+
+            existing = self._existing_summary(video_id, self._transcript_unchanged(video_info, text))
+            if existing:
+                self._record_summary(video_info, existing)
+                return None
+            return video_info, text
+        except Exception as e:
+            self.logger.error(f"Error processing {video_id}: {e}")
+            self._record_failure(video_info, 'ERROR', str(e))
+            return None
+
     def _dry_run(self):
         """Dry run to show what would be processed"""
-        videos = self.get_video_ids()
+        videos = list(self.get_video_ids())
         print(f"\nDry run mode - would process {len(videos)} videos:")
 
         new_count = 0
@@ -1012,45 +1749,379 @@ class YouTubeSummaryTool:
             print("Force mode enabled - would regenerate all")
 
 
-def main():
-    """Main entry point"""
+class BatchSummaryRunner:
+    """Generate final summaries through the provider's batch API (--batch)
+
+    Transcripts (and, for long ones, the map-phase chunk summaries) are
+    prepared as in a normal run; the final summary prompts are then submitted
+    as one Anthropic Message Batch / OpenAI Batch job, which is billed at
+    about half price but may take up to 24 hours. Results go through the same
+    parsing, saving and index bookkeeping as real-time summaries.
+    """
+
+    # Terminal statuses of a batch job
+    ANTHROPIC_DONE = ('ended',)
+    OPENAI_DONE = ('completed', 'failed', 'expired', 'cancelled')
+
+    def __init__(self, tool: YouTubeSummaryTool):
+        self.tool = tool
+        self.args = tool.args
+        self.logger = tool.logger
+
+    def run(self):
+        """Prepare prompts, submit them as one batch and record the results"""
+        tool = self.tool
+        videos = list(tool.get_video_ids())
+        self.logger.info(f"Preparing {len(videos)} videos for batch summarization")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+                prepared = [item for item in tqdm(
+                    executor.map(lambda video: self._prepare(*video), videos),
+                    total=len(videos), desc="Preparing prompts") if item]
+
+            if not prepared:
+                self.logger.info("Nothing to submit")
+                return
+
+            prompts = {video_info.video_id: prompt for video_info, _, _, prompt in prepared}
+            if self.args.provider == 'anthropic':
+                responses = self._run_anthropic(prompts)
+            else:
+                responses = self._run_openai(prompts)
+
+            for video_info, metadata, content, _ in prepared:
+                video_id = video_info.video_id
+                response = responses.get(video_id)
+                summary = tool._parse_summary(video_id, response, content, metadata) if response else None
+                if summary:
+                    tool._save_summary(summary)
+                    tool._record_summary(video_info, summary)
+                else:
+                    tool._record_failure(video_info, 'SUMMARY_FAILED', 'Batch request failed')
+        finally:
+            with tool._index_lock:
+                tool._save_index()
+
+        self.logger.info("Batch processing completed")
+
+    def _prepare(self, video_id: str, metadata: Dict[str, str]) -> Optional[Tuple[VideoInfo, Dict[str, str], str, str]]:
+        """Fetch the transcript and build the final prompt for one video
+
+        Returns None when the video is already done or failed here.
+        """
+        tool = self.tool
+        pending = tool._pending_transcript(video_id, metadata)
+        if pending is None:
+            return None
+        video_info, text = pending
+        try:
+            # Long transcripts still run their map phase in real time; only
+            # the final summary goes into the batch
+            is_reduced = tool._needs_map_reduce(text)
+            content = tool._summarize_chunks(video_id, text) if is_reduced else text
+            if content is None:
+                tool._record_failure(video_info, 'SUMMARY_FAILED', 'Failed to generate summary')
+                return None
+
+            return video_info, metadata, content, tool._final_summary_prompt(content, metadata, is_reduced)
+        except Exception as e:
+            self.logger.error(f"Error preparing {video_id}: {e}")
+            tool._record_failure(video_info, 'ERROR', str(e))
+            return None
+
+    def _wait(self, retrieve: Callable[[], Any], status_of: Callable[[Any], str], done: Tuple[str, ...]) -> Any:
+        """Poll a batch job until it reaches a terminal status"""
+        while True:
+            batch = retrieve()
+            status = status_of(batch)
+            if status in done:
+                return batch
+            self.logger.info(f"Batch {batch.id} is {status}; checking again in {self.args.batch_poll_interval}s")
+            time.sleep(self.args.batch_poll_interval)
+
+    def _run_anthropic(self, prompts: Dict[str, str]) -> Dict[str, str]:
+        """Run the prompts as an Anthropic Message Batch"""
+        client = self.tool._ai_routes[0].client.with_options(max_retries=2)
+
+        batch = client.messages.batches.create(requests=[{
+            'custom_id': video_id,
+            'params': {
+                'model': self.args.model,
+                'max_tokens': self.args.summary_max_tokens,
+                'messages': [{"role": "user", "content": prompt}],
+            },
+        } for video_id, prompt in prompts.items()])
+        self.logger.info(f"Submitted Anthropic batch {batch.id} with {len(prompts)} requests")
+
+        batch = self._wait(lambda: client.messages.batches.retrieve(batch.id),
+                           lambda b: b.processing_status, self.ANTHROPIC_DONE)
+
+        responses: Dict[str, str] = {}
+        for entry in client.messages.batches.results(batch.id):
+            if entry.result.type == 'succeeded':
+                responses[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                self.logger.error(f"Batch request for {entry.custom_id} {entry.result.type}")
+        return responses
+
+    def _run_openai(self, prompts: Dict[str, str]) -> Dict[str, str]:
+        """Run the prompts as an OpenAI Batch job"""
+        client = self.tool._ai_routes[0].client.with_options(max_retries=2)
+
+        # The model's default output limit is used, as in the first attempt
+        # of _call_openai
+        lines = [orjson.dumps({
+            'custom_id': video_id,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': {
+                'model': self.args.model,
+                'messages': [{"role": "user", "content": prompt}],
+                'response_format': {"type": "json_object"},
+            },
+        }) for video_id, prompt in prompts.items()]
+        input_file = client.files.create(file=('batch.jsonl', b'\n'.join(lines)), purpose='batch')
+        batch = client.batches.create(input_file_id=input_file.id,
+                                      endpoint='/v1/chat/completions',
+                                      completion_window='24h')
+        self.logger.info(f"Submitted OpenAI batch {batch.id} with {len(prompts)} requests")
+
+        batch = self._wait(lambda: client.batches.retrieve(batch.id),
+                           lambda b: b.status, self.OPENAI_DONE)
+        if batch.status != 'completed' or not batch.output_file_id:
+            self.logger.error(f"Batch {batch.id} finished with status {batch.status}")
+            return {}
+
+        responses: Dict[str, str] = {}
+        for line in client.files.content(batch.output_file_id).content.splitlines():
+            entry = orjson.loads(line)
+            response = entry.get('response') or {}
+            if response.get('status_code') == 200:
+                responses[entry['custom_id']] = response['body']['choices'][0]['message']['content']
+            else:
+                self.logger.error(f"Batch request for {entry['custom_id']} failed: {entry.get('error')}")
+        return responses
+
+
+class PackedSummaryRunner:
+    """Summarize several short transcripts per AI call (--pack-videos)
+
+    When the request rate rather than token throughput is the limit, packing
+    up to K short videos into one prompt gets K summaries for one request.
+    Videos are packed greedily while the combined transcripts stay within the
+    size of a single direct-summary prompt; long transcripts, and any video
+    missing from a packed answer, are summarized on their own as usual.
+    """
+
+    def __init__(self, tool: YouTubeSummaryTool):
+        self.tool = tool
+        self.args = tool.args
+        self.logger = tool.logger
+
+    def run(self):
+        """Fetch transcripts, then summarize them pack by pack"""
+        tool = self.tool
+        videos = list(tool.get_video_ids())
+        metadata_by_id = dict(videos)
+        self.logger.info(f"Processing {len(videos)} videos, up to {self.args.pack_videos} per prompt")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+                pending = [item for item in tqdm(
+                    executor.map(lambda video: tool._pending_transcript(*video), videos),
+                    total=len(videos), desc="Fetching transcripts") if item]
+
+                packs = self._packs(pending)
+                for _ in tqdm(executor.map(lambda pack: self._summarize_pack(pack, metadata_by_id), packs),
+                              total=len(packs), desc="Summarizing"):
+                    pass
+        finally:
+            with tool._index_lock:
+                tool._save_index()
+
+        self.logger.info("Processing completed")
+
+    def _packs(self, pending: List[Tuple[VideoInfo, str]]) -> List[List[Tuple[VideoInfo, str]]]:
+        """Group short transcripts into packs; long ones get a pack of their own"""
+        limit = self.args.chunk_chars * 2  # same budget as one direct summary
+        packs: List[List[Tuple[VideoInfo, str]]] = []
+        current: List[Tuple[VideoInfo, str]] = []
+        size = 0
+        for video_info, text in pending:
+            if self.tool._needs_map_reduce(text):
+                packs.append([(video_info, text)])
+                continue
+            if current and (len(current) >= self.args.pack_videos or size + len(text) > limit):
+                packs.append(current)
+                current, size = [], 0
+            current.append((video_info, text))
+            size += len(text)
+        if current:
+            packs.append(current)
+        return packs
+
+    def _summarize_pack(self, pack: List[Tuple[VideoInfo, str]], metadata_by_id: Dict[str, Dict[str, str]]):
+        """Summarize one pack and record each video's outcome"""
+        tool = self.tool
+        answers: Dict[str, Any] = {}
+        if len(pack) > 1:
+            items = [(video_info.video_id, text, metadata_by_id[video_info.video_id])
+                     for video_info, text in pack]
+            response = tool._call_ai(tool._packed_summary_prompt(items),
+                                     max_tokens=self.args.summary_max_tokens * len(pack))
+            try:
+                parsed = _loads_ai_json(response) if response else {}
+                answers = parsed if isinstance(parsed, dict) else {}
+            except ValueError:
+                self.logger.error(f"Failed to parse packed AI response as JSON for {len(pack)} videos")
+
+        for video_info, text in pack:
+            video_id = video_info.video_id
+            metadata = metadata_by_id[video_id]
+            try:
+                answer = answers.get(video_id)
+                if answer is not None and not _schema_type_errors(answer, SUMMARY_SCHEMA):
+                    summary: Optional[SummaryResult] = tool._summary_from_data(video_id, answer, text, metadata)
+                    tool._save_summary(summary)
+                else:
+                    # Not packed, or left out of the packed answer
+                    summary = tool.generate_summary(video_id, text, metadata)
+                if summary:
+                    tool._record_summary(video_info, summary)
+                else:
+                    tool._record_failure(video_info, 'SUMMARY_FAILED', 'Failed to generate summary')
+            except Exception as e:
+                self.logger.error(f"Error processing {video_id}: {e}")
+                tool._record_failure(video_info, 'ERROR', str(e))
+
+
+def _env_bool(raw: str) -> bool:
+    return raw.lower() == 'true'
+
+
+def _env_limit(raw: str) -> Optional[float]:
+    return float(raw) or None  # 0 means unset
+
+
+@dataclass(frozen=True)
+class EnvConfig:
+    """Command-line defaults from the environment / .env, read and validated once"""
+    outdir: str = './out'
+    max_videos: int = 50
+    languages: str = 'ja,ja-JP,en'
+    clean_tags: bool = False
+    provider: str = 'anthropic'
+    model: str = 'claude-3-5-sonnet-latest'
+    chunk_chars: int = 6000
+    chunk_overlap: int = 300
+    rps: float = 0.8
+    concurrency: int = 4
+    ai_concurrency: int = 4
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+    proxy: Optional[str] = None
+    cookies_file: Optional[str] = None
+    use_ytdlp: bool = False
+
+    # field: (environment variable, conversion)
+    ENV = {
+        'outdir': ('OUTPUT_DIR', str),
+        'max_videos': ('MAX_VIDEOS', int),
+        'languages': ('LANGUAGES', str),
+        'clean_tags': ('CLEAN_TAGS', _env_bool),
+        'provider': ('AI_PROVIDER', str),
+        'model': ('AI_MODEL', str),
+        'chunk_chars': ('CHUNK_SIZE', int),
+        'chunk_overlap': ('CHUNK_OVERLAP', int),
+        'rps': ('REQUESTS_PER_SECOND', float),
+        'concurrency': ('CONCURRENCY', int),
+        'ai_concurrency': ('AI_CONCURRENCY', int),
+        'rpm': ('AI_RPM', _env_limit),
+        'tpm': ('AI_TPM', _env_limit),
+        'proxy': ('PROXY_URL', str),
+        'cookies_file': ('COOKIES_FILE', str),
+        'use_ytdlp': ('USE_YTDLP', _env_bool),
+    }
+    PROVIDERS = ('anthropic', 'openai')
+
+    @classmethod
+    def from_env(cls) -> 'EnvConfig':
+        """Read every variable once; ValueError names the one that is invalid"""
+        values: Dict[str, Any] = {}
+        for field, (name, convert) in cls.ENV.items():
+            raw = os.getenv(name)
+            if not raw:
+                continue
+            try:
+                values[field] = convert(raw)
+            except ValueError:
+                expected = 'an integer' if convert is int else 'a number'
+                raise ValueError(f"{name}={raw!r}: expected {expected}") from None
+        if values.get('provider', cls.provider) not in cls.PROVIDERS:
+            raise ValueError(f"AI_PROVIDER must be one of {', '.join(cls.PROVIDERS)}, got {values['provider']!r}")
+        return cls(**values)
+
+
+@lru_cache(maxsize=1)
+def _env_config() -> EnvConfig:
+    return EnvConfig.from_env()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments (from sys.argv when argv is None)"""
     parser = argparse.ArgumentParser(
         description='YouTube Video Transcript and Summary Tool',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
+    try:
+        env = _env_config()
+    except ValueError as e:
+        parser.error(str(e))
 
     # Input sources (mutually exclusive)
     input_group = parser.add_mutually_exclusive_group(required=True)
     input_group.add_argument('--channel-id', help='YouTube channel ID')
     input_group.add_argument('--playlist-id', help='YouTube playlist ID')
     input_group.add_argument('--video-ids-file', help='File with video IDs/URLs (one per line)')
+    input_group.add_argument('--video-ids-stdin', action='store_true',
+                             help='Read video IDs/URLs from stdin as they arrive '
+                                  '(e.g. piped from channel_index.py --stream-ids)')
 
     # Output options
-    parser.add_argument('--outdir', default=os.getenv('OUTPUT_DIR', './out'),
+    parser.add_argument('--outdir', default=env.outdir,
                        help='Output directory (default: from .env or ./out)')
     parser.add_argument('--max-videos', type=int,
-                       default=int(os.getenv('MAX_VIDEOS', '50')),
+                       default=env.max_videos,
                        help='Maximum videos to process (default: from .env or 50)')
+    parser.add_argument('--index-file',
+                       help='Index CSV path (default: OUTDIR/index.csv)')
 
     # Transcript options
-    parser.add_argument('--languages', default=os.getenv('LANGUAGES', 'ja,ja-JP,en'),
+    parser.add_argument('--languages', default=env.languages,
                        help='Preferred languages in order (default: from .env or ja,ja-JP,en)')
     parser.add_argument('--clean-tags', action='store_true',
-                       default=os.getenv('CLEAN_TAGS', 'false').lower() == 'true',
+                       default=env.clean_tags,
                        help='Remove [tag] metadata from transcripts')
+    parser.add_argument('--pretty-json', action='store_true',
+                       help='Indent transcript JSON files (default: compact)')
 
     # AI provider options
     parser.add_argument('--provider', choices=['anthropic', 'openai'],
-                       default=os.getenv('AI_PROVIDER', 'anthropic'),
+                       default=env.provider,
                        help='AI provider (default: from .env or anthropic)')
     parser.add_argument('--model',
-                       default=os.getenv('AI_MODEL', 'claude-3-5-sonnet-latest'),
+                       default=env.model,
                        help='Model name (default: from .env or claude-3-5-sonnet-latest)')
+    parser.add_argument('--fallback-model',
+                       help='Model to retry a failed AI call with (default: no fallback)')
+    parser.add_argument('--fallback-provider', choices=EnvConfig.PROVIDERS,
+                       help='Provider of --fallback-model (default: same as --provider)')
     parser.add_argument('--chunk-chars', type=int,
-                       default=int(os.getenv('CHUNK_SIZE', '6000')),
+                       default=env.chunk_chars,
                        help='Characters per chunk for map-reduce (default: from .env or 6000)')
     parser.add_argument('--chunk-overlap', type=int,
-                       default=int(os.getenv('CHUNK_OVERLAP', '300')),
+                       default=env.chunk_overlap,
                        help='Overlap between chunks (default: from .env or 300)')
     parser.add_argument('--summary-max-tokens', type=int, default=2000,
                        help='Max tokens for summary (default: 2000)')
@@ -1061,26 +2132,76 @@ def main():
     parser.add_argument('--dry-run', action='store_true',
                        help='Show what would be processed without doing it')
     parser.add_argument('--rps', type=float,
-                       default=float(os.getenv('REQUESTS_PER_SECOND', '0.8')),
-                       help='Requests per second limit (default: from .env or 0.8)')
+                       default=env.rps,
+                       help='Requests per second limit, applied to YouTube and AI hosts separately (default: from .env or 0.8)')
+    parser.add_argument('--concurrency', type=int,
+                       default=env.concurrency,
+                       help='Transcripts fetched in parallel; --rps still caps the overall '
+                            'request rate (default: from .env or 4)')
+    parser.add_argument('--ai-concurrency', type=int,
+                       default=env.ai_concurrency,
+                       help='Videos summarized in parallel and maximum concurrent AI calls, '
+                            'e.g. chunk summaries of long transcripts (default: from .env or 4)')
+    parser.add_argument('--rpm', type=float, default=env.rpm,
+                       help='AI requests per minute; paces AI calls instead of --rps '
+                            '(default: from .env or unset)')
+    parser.add_argument('--tpm', type=float, default=env.tpm,
+                       help='AI tokens per minute (prompt estimate + max output); paces '
+                            'AI calls instead of --rps (default: from .env or unset)')
+    parser.add_argument('--batch', action='store_true',
+                       help='Submit final summaries as one provider batch job '
+                            '(about half the cost; results may take up to 24h)')
+    parser.add_argument('--batch-poll-interval', type=float, default=60,
+                       help='Seconds between batch status checks (default: 60)')
+    parser.add_argument('--no-ai-cache', action='store_true',
+                       help='Always call the AI provider instead of reusing cached responses')
+    parser.add_argument('--pack-videos', type=int, default=1, metavar='K',
+                       help='Summarize up to K short videos per AI call; helps when the '
+                            'request rate is the bottleneck (default: 1, no packing)')
+    parser.add_argument('--map-batch', type=int, default=1, metavar='K',
+                       help='Summarize up to K chunks of a long transcript per AI call in the '
+                            'map phase (default: 1, one call per chunk)')
 
     # Logging
     parser.add_argument('--log-file', help='Log file path')
 
     # Proxy and authentication
-    parser.add_argument('--proxy', default=os.getenv('PROXY_URL'),
-                       help='HTTP/HTTPS proxy URL (e.g., http://proxy.example.com:8080)')
-    parser.add_argument('--cookies-file', default=os.getenv('COOKIES_FILE'),
+    parser.add_argument('--proxy', default=env.proxy,
+                       help='HTTP/HTTPS proxy URL for all YouTube requests: transcripts, yt-dlp and '
+                            'channel RSS feeds; AI API calls do not use it '
+                            '(e.g., http://proxy.example.com:8080)')
+    parser.add_argument('--cookies-file', default=env.cookies_file,
                        help='Path to cookies.txt file for YouTube authentication')
     parser.add_argument('--use-ytdlp', action='store_true',
-                       default=os.getenv('USE_YTDLP', 'false').lower() == 'true',
+                       default=env.use_ytdlp,
                        help='Use yt-dlp for transcript fetching (more robust, avoids IP blocks)')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.batch and args.pack_videos > 1:
+        parser.error('--batch and --pack-videos cannot be used together')
+    if args.pack_videos < 1 or args.map_batch < 1:
+        parser.error('--pack-videos and --map-batch must be at least 1')
+    if args.fallback_provider and not args.fallback_model:
+        parser.error('--fallback-provider requires --fallback-model')
+    return args
+
+
+def run(args: argparse.Namespace) -> Dict[str, VideoInfo]:
+    """Run the tool with parsed arguments and return the resulting index
 
-    # Run the tool
+    Lets process_channel.py drive the tool in-process instead of spawning it.
+    """
     tool = YouTubeSummaryTool(args)
-    tool.run()
+    try:
+        tool.run()
+    finally:
+        tool.close()
+    return tool.index_data
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main entry point"""
+    run(parse_args(argv))
 
 
 if __name__ == '__main__':